@@ -0,0 +1,170 @@
+"""
+Semantic cache of LLM fallback answers, persisted in SQLite.
+
+An entry is the (normalized) question embedding, the ids of the KB rows that
+were retrieved as context, and the LLM answer. A new question hits when it
+retrieved the same KB rows and its embedding is within `max_distance` cosine
+distance of a cached question. Conversation history is not part of the key.
+
+Entries are bounded by count (LRU) and age (TTL). Each row records the
+dataset version it was computed on and only rows of the current version are
+loaded or served, so workers sharing one database never serve each other's
+answers for an older dataset; rows of other versions are deleted when the
+version changes.
+"""
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def context_key(kb_ids):
+    return ",".join(str(int(i)) for i in kb_ids)
+
+
+class SemanticAnswerCache:
+    def __init__(self, path=":memory:", max_entries=1000, ttl=None, max_distance=0.08, dataset_version=""):
+        self.max_entries = max_entries
+        self.ttl = ttl or None
+        self.min_similarity = 1.0 - max_distance
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS answers (
+                id INTEGER PRIMARY KEY,
+                context_key TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                answer TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                dataset_version TEXT NOT NULL DEFAULT ''
+            );
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(answers)")}
+        if "dataset_version" not in columns:
+            # databases from before per-row versions: their rows are never served
+            self._conn.execute("ALTER TABLE answers ADD COLUMN dataset_version TEXT NOT NULL DEFAULT ''")
+        self._groups = {}         # context_key -> {entry id: (embedding, answer, created_at)}
+        self._lru = OrderedDict()  # entry id -> context_key, least recently used first
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.dataset_version = None
+        self.set_dataset_version(dataset_version)
+
+    def _load_locked(self):
+        rows = self._conn.execute(
+            "SELECT id, context_key, embedding, answer, created_at FROM answers WHERE dataset_version = ? ORDER BY id",
+            (self.dataset_version,),
+        ).fetchall()
+        for entry_id, key, blob, answer, created_at in rows:
+            emb = np.frombuffer(blob, dtype=np.float32)
+            self._groups.setdefault(key, {})[entry_id] = (emb, answer, created_at)
+            self._lru[entry_id] = key
+
+    def set_dataset_version(self, version):
+        """
+        Switches to the entries stored for version (possibly by another
+        worker) and deletes the rows of every other version.
+        """
+        with self._lock:
+            if version == self.dataset_version:
+                return
+            self.dataset_version = version
+            self._conn.execute("DELETE FROM answers WHERE dataset_version != ?", (version,))
+            self._conn.commit()
+            self._groups.clear()
+            self._lru.clear()
+            self._load_locked()
+
+    def clear(self):
+        with self._lock:
+            self._clear_locked()
+            self._conn.commit()
+
+    def _clear_locked(self):
+        self._conn.execute("DELETE FROM answers")
+        self._groups.clear()
+        self._lru.clear()
+
+    def _delete_locked(self, entry_id):
+        key = self._lru.pop(entry_id)
+        group = self._groups[key]
+        del group[entry_id]
+        if not group:
+            del self._groups[key]
+        self._conn.execute("DELETE FROM answers WHERE id = ?", (entry_id,))
+
+    @staticmethod
+    def _unit(query_emb):
+        q = np.asarray(query_emb, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(q)
+        return q / norm if norm else q
+
+    def lookup(self, query_emb, kb_ids):
+        """
+        Returns the cached answer for a near-identical question with the same
+        retrieved context, or None.
+        """
+        key = context_key(kb_ids)
+        q = self._unit(query_emb)
+        with self._lock:
+            group = self._groups.get(key)
+            if group and self.ttl:
+                now = time.time()
+                for entry_id in [i for i, e in group.items() if now - e[2] > self.ttl]:
+                    self._delete_locked(entry_id)
+                    self.expirations += 1
+                self._conn.commit()
+                group = self._groups.get(key)
+            if not group:
+                self.misses += 1
+                return None
+
+            ids = list(group.keys())
+            sims = np.stack([group[i][0] for i in ids]) @ q
+            best = int(np.argmax(sims))
+            if sims[best] < self.min_similarity:
+                self.misses += 1
+                return None
+            self._lru.move_to_end(ids[best])
+            self.hits += 1
+            return group[ids[best]][1]
+
+    def store(self, query_emb, kb_ids, answer):
+        key = context_key(kb_ids)
+        q = self._unit(query_emb)
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO answers (context_key, embedding, answer, created_at, dataset_version) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, q.tobytes(), answer, now, self.dataset_version),
+            )
+            entry_id = cur.lastrowid
+            self._groups.setdefault(key, {})[entry_id] = (q, answer, now)
+            self._lru[entry_id] = key
+            self.stores += 1
+            while len(self._lru) > self.max_entries:
+                self._delete_locked(next(iter(self._lru)))
+                self.evictions += 1
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._lru),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
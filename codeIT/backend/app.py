@@ -1,15 +1,45 @@
+import asyncio
+import hmac
+import json
 import logging
 import os
 from datetime import datetime, timezone
-from typing import Dict, List
+from typing import Dict, Optional
 from uuid import uuid4
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-from chatbot import get_ai_response
-from .schemas import ChatRequest, ChatResponse, ChatTurn
+import metrics
+import startup_profile
+
+with startup_profile.stage("import chatbot"):
+    from chatbot import (
+        answer_cache,
+        current_snapshot,
+        get_ai_response_async,
+        get_ai_response_stream,
+        get_ai_responses_async,
+        reload_kb,
+        response_cache,
+        warm_up,
+    )
+from kb_artifact import DATA_FILE
+from kb_reloader import DatasetWatcher
+from llm import llm_client, prompt_builder
+from utils import query_cache
+from .schemas import (
+    BatchChatRequest,
+    BatchChatResponse,
+    BatchChatResult,
+    ChatRequest,
+    ChatResponse,
+    ChatTurn,
+    KBInfo,
+)
+from .sessions import create_session_store
 
 # Configure logging once for the service
 logging.basicConfig(level=logging.INFO)
@@ -39,22 +69,56 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Simple in-memory store keyed by session identifier
-SessionHistory = List[Dict[str, str]]
-sessions: Dict[str, SessionHistory] = {}
+# Largest accepted /chat/batch request
+CHAT_BATCH_MAX_ITEMS = int(os.getenv("CHAT_BATCH_MAX_ITEMS", "500"))
+
+# Seconds between checks of the dataset file for changes (0 disables hot reload)
+KB_RELOAD_INTERVAL_S = float(os.getenv("KB_RELOAD_INTERVAL_S", "5"))
+
+# Token required in the X-Admin-Token header of /admin/* requests (empty: no check)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Bounded session store (in-memory LRU or shared SQLite, see SESSION_STORE)
+sessions = create_session_store()
+
+# Polls DATA_FILE and hot-reloads the KB (started on startup)
+kb_watcher = None
 
 
 @app.on_event("startup")
 def startup_event() -> None:
-    """Eagerly import heavy resources on process start."""
+    """Eagerly load the encoder, run one real encode + search and start the dataset watcher."""
     try:
-        # Trigger a lightweight call to ensure embeddings and dataset are loaded.
-        _ = get_ai_response("Hello")
-        logger.info("Chatbot backend warmed up successfully.")
+        warm_up()
+        logger.info("Chatbot backend warmed up successfully.\n%s", startup_profile.report())
+        startup_profile.stop()
     except Exception as exc:  # pragma: no cover - diagnostic logging only
         logger.exception("Chatbot warm-up failed: %s", exc)
         raise
 
+    global kb_watcher
+    if KB_RELOAD_INTERVAL_S > 0 and os.path.exists(DATA_FILE):
+        kb_watcher = DatasetWatcher(DATA_FILE, reload_kb, interval=KB_RELOAD_INTERVAL_S).start()
+
+
+@app.on_event("shutdown")
+def shutdown_event() -> None:
+    """Stop the dataset watcher."""
+    if kb_watcher is not None:
+        kb_watcher.stop()
+
+
+async def run_store(method, *args):
+    """Calls a session store method, in a worker thread when the store blocks."""
+    if sessions.blocking:
+        return await asyncio.to_thread(method, *args)
+    return method(*args)
+
+
+def require_admin(token: Optional[str]) -> None:
+    if ADMIN_TOKEN and not hmac.compare_digest(token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
 
 @app.get("/health", tags=["system"])
 def healthcheck() -> Dict[str, str]:
@@ -62,28 +126,201 @@ def healthcheck() -> Dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse, tags=["system"])
+def metrics_endpoint() -> PlainTextResponse:
+    """Prometheus text exposition of this worker's chat metrics."""
+    lines = metrics.registry.render()
+    lines += metrics.render_counter(
+        "codeit_llm_calls_total", "LLM client calls by outcome.", "outcome",
+        {k: v for k, v in llm_client.stats.items() if k != "calls"},
+    )
+    lines += metrics.render_counter(
+        "codeit_llm_singleflight_total", "LLM requests that started a call (leader) or joined one (shared).",
+        "role", llm_client.flight.stats,
+    )
+    lines += metrics.render_counter(
+        "codeit_llm_prompt_dropped_total", "Context blocks and history turns left out of LLM prompts by the budget.",
+        "part", {
+            "context_blocks": prompt_builder.stats["context_blocks_dropped"],
+            "history_turns": prompt_builder.stats["history_turns_dropped"],
+        },
+    )
+    for name, cache in (("query_embedding", query_cache), ("llm_answer", answer_cache), ("response", response_cache)):
+        if cache is None:
+            continue
+        stats = cache.stats()
+        lines += metrics.render_counter(
+            f"codeit_{name}_cache_lookups_total", f"{name} cache lookups by result.", "result",
+            {"hit": stats["hits"], "miss": stats["misses"]},
+        )
+    if response_cache is not None:
+        branches = response_cache.stats()["branches"]
+        lines += metrics.render_counter(
+            "codeit_response_cache_hits_total", "Replies served from the response cache by answering branch.",
+            "branch", {b: v["hits"] for b, v in branches.items()},
+        )
+        lines += metrics.render_counter(
+            "codeit_response_cache_misses_total", "Cacheable replies computed on a response cache miss by branch.",
+            "branch", {b: v["misses"] for b, v in branches.items()},
+        )
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+
+@app.get("/admin/kb", response_model=KBInfo, tags=["admin"])
+def kb_info(x_admin_token: Optional[str] = Header(default=None)) -> KBInfo:
+    """Report the KB snapshot currently serving requests."""
+    require_admin(x_admin_token)
+    return KBInfo(**current_snapshot().info())
+
+
+@app.post("/admin/reload", response_model=KBInfo, tags=["admin"])
+async def kb_reload(force: bool = False, x_admin_token: Optional[str] = Header(default=None)) -> KBInfo:
+    """
+    Reload the KB from the dataset file now. The rebuild runs in a worker
+    thread and the new snapshot is swapped in atomically; with force=false an
+    unchanged dataset is not rebuilt.
+    """
+    require_admin(x_admin_token)
+    try:
+        info = await asyncio.to_thread(reload_kb, force)
+    except Exception as exc:
+        logger.exception("KB reload failed: %s", exc)
+        raise HTTPException(status_code=500, detail=f"KB reload failed, keeping the current KB: {str(exc)}")
+    return KBInfo(**info)
+
+
 @app.post("/chat", response_model=ChatResponse, tags=["chat"])
-def chat_endpoint(request: ChatRequest) -> ChatResponse:
+async def chat_endpoint(request: ChatRequest) -> ChatResponse:
     """Return a chatbot reply and updated history for a given session."""
     message = request.message.strip()
     if not message:
         raise HTTPException(status_code=422, detail="Message cannot be empty.")
 
     session_id = request.session_id or str(uuid4())
-    history = sessions.setdefault(session_id, [])
+    history = await run_store(sessions.history, session_id)
 
     # Convert history to list of dicts for chatbot
     chat_history = [{"role": turn["role"], "content": turn["content"]} for turn in history]
 
     try:
-        reply = get_ai_response(message, history=chat_history)
+        reply = await get_ai_response_async(message, history=chat_history)
     except Exception as exc:
         logger.exception("Chatbot response generation failed: %s", exc)
         raise HTTPException(status_code=500, detail=f"Failed to generate response: {str(exc)}")
 
-    now = datetime.now(timezone.utc).isoformat()
-    history.append({"role": "user", "content": message, "timestamp": now})
-    history.append({"role": "assistant", "content": reply, "timestamp": datetime.now(timezone.utc).isoformat()})
+    return await record_exchange(request, session_id, message, reply, datetime.now(timezone.utc).isoformat())
+
+
+async def record_exchange(
+    request: ChatRequest, session_id: str, message: str, reply: str, asked_at: str
+) -> ChatResponse:
+    """Append one exchange to the session and build the response per history_mode."""
+    new_turns = [
+        {"role": "user", "content": message, "timestamp": asked_at},
+        {"role": "assistant", "content": reply, "timestamp": datetime.now(timezone.utc).isoformat()},
+    ]
+    total = await run_store(sessions.append, session_id, new_turns)
+
+    if request.history_mode == "new":
+        start, returned = total - len(new_turns), new_turns
+    else:
+        since = (request.since_turn or 0) if request.history_mode == "since" else 0
+        start, returned = await run_store(sessions.turns_since, session_id, since)
+
+    turns = [ChatTurn(**turn) for turn in returned]
+    return ChatResponse(
+        reply=reply, session_id=session_id, history=turns, history_start=start, total_turns=total
+    )
+
+
+def sse_event(event: str, data) -> str:
+    """One Server-Sent Events message with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/chat/stream", tags=["chat"])
+async def chat_stream_endpoint(request: ChatRequest) -> StreamingResponse:
+    """
+    Stream a chatbot reply as Server-Sent Events: one `delta` event per text
+    chunk (rule and KB answers arrive as a single chunk, LLM answers as they
+    are generated), then a `done` event carrying the same payload as /chat.
+    The session is updated only once the reply is complete; a reply that
+    fails mid-stream ends with an `error` event instead, and it and a client
+    that disconnects mid-stream leave the session unchanged.
+    """
+    message = request.message.strip()
+    if not message:
+        raise HTTPException(status_code=422, detail="Message cannot be empty.")
+
+    session_id = request.session_id or str(uuid4())
+    history = await run_store(sessions.history, session_id)
+    chat_history = [{"role": turn["role"], "content": turn["content"]} for turn in history]
+    asked_at = datetime.now(timezone.utc).isoformat()
+
+    async def events():
+        parts = []
+        try:
+            async for chunk in get_ai_response_stream(message, history=chat_history):
+                parts.append(chunk)
+                yield sse_event("delta", {"text": chunk})
+        except Exception as exc:
+            logger.exception("Chatbot stream failed: %s", exc)
+            yield sse_event("error", {"detail": f"Failed to generate response: {str(exc)}"})
+            return
+        response = await record_exchange(request, session_id, message, "".join(parts), asked_at)
+        yield sse_event("done", response.model_dump())
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/chat/batch", response_model=BatchChatResponse, tags=["chat"])
+async def chat_batch_endpoint(request: BatchChatRequest) -> BatchChatResponse:
+    """
+    Answer many messages in one call. Items with a session_id read that
+    session's history as it was before the batch and have their exchange
+    appended in input order; items without one are not recorded.
+    """
+    if len(request.items) > CHAT_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {CHAT_BATCH_MAX_ITEMS} items per batch.")
+
+    messages = [item.message.strip() for item in request.items]
+    histories = await run_store(read_histories, request.items)
+
+    try:
+        replies = await get_ai_responses_async(messages, histories)
+    except Exception as exc:
+        logger.exception("Batch response generation failed: %s", exc)
+        raise HTTPException(status_code=500, detail=f"Failed to generate responses: {str(exc)}")
+
+    await run_store(append_exchanges, request.items, messages, replies)
+
+    return BatchChatResponse(
+        results=[BatchChatResult(reply=reply, session_id=item.session_id) for item, reply in zip(request.items, replies)]
+    )
+
+
+def read_histories(items) -> list:
+    """Chat histories of the batch items with a session_id (None for the others)."""
+    histories = []
+    for item in items:
+        if item.session_id:
+            history = sessions.history(item.session_id)
+            histories.append([{"role": turn["role"], "content": turn["content"]} for turn in history])
+        else:
+            histories.append(None)
+    return histories
+
 
-    turns = [ChatTurn(**turn) for turn in history]
-    return ChatResponse(reply=reply, session_id=session_id, history=turns)
+def append_exchanges(items, messages, replies) -> None:
+    """Appends each batch item's exchange to its session, in input order."""
+    for item, message, reply in zip(items, messages, replies):
+        if item.session_id:
+            now = datetime.now(timezone.utc).isoformat()
+            sessions.append(item.session_id, [
+                {"role": "user", "content": message, "timestamp": now},
+                {"role": "assistant", "content": reply, "timestamp": now},
+            ])
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -14,6 +14,14 @@ class ChatRequest(BaseModel):
     session_id: Optional[str] = Field(
         default=None, description="Existing session identifier to preserve history."
     )
+    history_mode: Literal["full", "new", "since"] = Field(
+        default="full",
+        description="'full' returns the retained transcript, 'new' only this exchange, "
+        "'since' the turns from since_turn onwards.",
+    )
+    since_turn: Optional[int] = Field(
+        default=None, ge=0, description="Turn index to return history from when history_mode is 'since'."
+    )
 
 
 class ChatResponse(BaseModel):
@@ -23,3 +31,41 @@ class ChatResponse(BaseModel):
         default_factory=list,
         description="Chronological conversation turns including the latest exchange.",
     )
+    history_start: int = Field(
+        default=0, description="Session turn index of the first entry in history."
+    )
+    total_turns: int = Field(
+        default=0, description="Number of turns in the session including the latest exchange."
+    )
+
+
+class BatchChatItem(BaseModel):
+    message: str = Field(..., min_length=1, description="User utterance.")
+    session_id: Optional[str] = Field(
+        default=None,
+        description="Session to read history from and append this exchange to; omitted items are stateless.",
+    )
+
+
+class BatchChatRequest(BaseModel):
+    items: List[BatchChatItem] = Field(..., min_length=1, description="Messages to answer, in order.")
+
+
+class BatchChatResult(BaseModel):
+    reply: str = Field(..., description="Bot reply for the corresponding item.")
+    session_id: Optional[str] = Field(default=None, description="Session the exchange was recorded in, if any.")
+
+
+class BatchChatResponse(BaseModel):
+    results: List[BatchChatResult] = Field(default_factory=list, description="Replies in input order.")
+
+
+class KBInfo(BaseModel):
+    version: str = Field(..., description="SHA-256 of the dataset the serving KB snapshot was built from.")
+    built_at: str = Field(..., description="ISO-8601 timestamp of when the snapshot was built.")
+    build_seconds: float = Field(..., description="Time taken to build the snapshot.")
+    texts: int = Field(..., description="Number of KB texts (rows) in the snapshot.")
+    answers: int = Field(..., description="Number of distinct KB answers in the snapshot.")
+    reloaded: Optional[bool] = Field(
+        default=None, description="For /admin/reload: whether a new snapshot was swapped in."
+    )
@@ -0,0 +1,194 @@
+"""
+Session stores for chat history.
+
+Turns carry an absolute index within their session (0 for the first user
+message) so clients can ask for "everything since turn N". Each session keeps
+at most `max_turns` recent turns; older ones fall off the front.
+"""
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List, Tuple
+
+Turn = Dict[str, str]
+
+
+class SessionStore(ABC):
+    """Interface implemented by the concrete stores below."""
+
+    # True when calls do blocking I/O and must stay off the event loop
+    blocking = False
+
+    @abstractmethod
+    def append(self, session_id: str, turns: List[Turn]) -> int:
+        """Appends turns and returns the session's total turn count."""
+
+    @abstractmethod
+    def turns_since(self, session_id: str, start: int = 0) -> Tuple[int, List[Turn]]:
+        """
+        Returns (first_index, turns) for retained turns with index >= start.
+        first_index may be larger than start if older turns were dropped.
+        """
+
+    def history(self, session_id: str) -> List[Turn]:
+        return self.turns_since(session_id, 0)[1]
+
+    def total_turns(self, session_id: str) -> int:
+        first, turns = self.turns_since(session_id, 0)
+        return first + len(turns)
+
+
+class InMemorySessionStore(SessionStore):
+    """LRU + TTL bounded store; each session is a ring buffer of turns."""
+
+    def __init__(self, max_sessions=10000, ttl=86400.0, max_turns=50):
+        self.max_sessions = max_sessions
+        self.ttl = ttl or None
+        self.max_turns = max_turns
+        self._sessions = OrderedDict()  # id -> [ring buffer, total turns, last access]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _get_locked(self, session_id, create=False):
+        now = time.monotonic()
+        entry = self._sessions.get(session_id)
+        if entry is not None and self.ttl and now - entry[2] > self.ttl:
+            del self._sessions[session_id]
+            entry = None
+        if entry is None:
+            if not create:
+                return None
+            entry = self._sessions[session_id] = [deque(maxlen=self.max_turns), 0, now]
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        entry[2] = now
+        self._sessions.move_to_end(session_id)
+        return entry
+
+    def append(self, session_id, turns):
+        with self._lock:
+            entry = self._get_locked(session_id, create=True)
+            entry[0].extend(turns)
+            entry[1] += len(turns)
+            return entry[1]
+
+    def turns_since(self, session_id, start=0):
+        with self._lock:
+            entry = self._get_locked(session_id)
+            if entry is None:
+                return 0, []
+            ring, total = entry[0], entry[1]
+            first = total - len(ring)
+            start = max(start, first)
+            return start, list(ring)[start - first:]
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    SQLite-backed store so several uvicorn workers can share sessions.
+    Expired sessions are purged opportunistically on write. Calls can wait
+    up to 10s on the database lock, so the API runs them in worker threads.
+    """
+
+    blocking = True
+
+    def __init__(self, path="sessions.sqlite3", ttl=86400.0, max_turns=50):
+        self.path = path
+        self.ttl = ttl or None
+        self.max_turns = max_turns
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                total INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS turns (
+                session_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                PRIMARY KEY (session_id, idx)
+            );
+            CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions (last_access);
+            """
+        )
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _expired(self, last_access, now):
+        return self.ttl is not None and now - last_access > self.ttl
+
+    def append(self, session_id, turns):
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            if self.ttl:
+                stale = now - self.ttl
+                conn.execute(
+                    "DELETE FROM turns WHERE session_id IN (SELECT session_id FROM sessions WHERE last_access < ?)",
+                    (stale,),
+                )
+                conn.execute("DELETE FROM sessions WHERE last_access < ?", (stale,))
+            row = conn.execute("SELECT total FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            total = row[0] if row else 0
+            conn.executemany(
+                "INSERT OR REPLACE INTO turns (session_id, idx, role, content, timestamp) VALUES (?, ?, ?, ?, ?)",
+                [(session_id, total + i, t["role"], t["content"], t["timestamp"]) for i, t in enumerate(turns)],
+            )
+            total += len(turns)
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, total, last_access) VALUES (?, ?, ?)",
+                (session_id, total, now),
+            )
+            conn.execute(
+                "DELETE FROM turns WHERE session_id = ? AND idx < ?", (session_id, total - self.max_turns)
+            )
+        return total
+
+    def turns_since(self, session_id, start=0):
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT total, last_access FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None or self._expired(row[1], now):
+            return 0, []
+        first = max(start, row[0] - self.max_turns, 0)
+        rows = conn.execute(
+            "SELECT role, content, timestamp FROM turns WHERE session_id = ? AND idx >= ? ORDER BY idx",
+            (session_id, first),
+        ).fetchall()
+        with conn:
+            conn.execute("UPDATE sessions SET last_access = ? WHERE session_id = ?", (now, session_id))
+        return first, [{"role": r, "content": c, "timestamp": ts} for r, c, ts in rows]
+
+
+def create_session_store():
+    """Builds the store selected by SESSION_STORE (memory or sqlite)."""
+    kind = os.getenv("SESSION_STORE", "memory").lower()
+    ttl = float(os.getenv("SESSION_TTL_S", "86400"))
+    max_turns = int(os.getenv("SESSION_MAX_TURNS", "50"))
+    if kind == "sqlite":
+        return SQLiteSessionStore(os.getenv("SESSION_DB_FILE", "sessions.sqlite3"), ttl=ttl, max_turns=max_turns)
+    if kind == "memory":
+        return InMemorySessionStore(
+            max_sessions=int(os.getenv("SESSION_MAX", "10000")), ttl=ttl, max_turns=max_turns
+        )
+    raise ValueError(f"Unknown SESSION_STORE {kind!r}")
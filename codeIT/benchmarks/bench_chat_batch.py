@@ -0,0 +1,72 @@
+"""
+/chat one message at a time vs one /chat/batch request.
+
+Uses the pipeline_suite workloads (rule, fuzzy course, semantic, off-topic)
+with the stub LLM, checks that the batch replies match the per-message ones,
+and compares wall time. The query-embedding cache is cleared before each run
+so both sides pay for encoding.
+
+Run from the codeIT directory:
+    python -m benchmarks.bench_chat_batch --requests 100
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+
+async def run(args):
+    import httpx
+
+    from backend.app import app
+    from benchmarks.pipeline_suite import build_workloads
+    from utils import query_cache
+
+    workloads = build_workloads(args.requests, seed=args.seed)
+    messages = [q for queries in workloads.values() for q in queries]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        query_cache.clear()
+        t0 = time.perf_counter()
+        single = []
+        for message in messages:
+            resp = await client.post("/chat", json={"message": message})
+            resp.raise_for_status()
+            single.append(resp.json()["reply"])
+        single_s = time.perf_counter() - t0
+
+        query_cache.clear()
+        t0 = time.perf_counter()
+        resp = await client.post("/chat/batch", json={"items": [{"message": m} for m in messages]})
+        resp.raise_for_status()
+        batch = [r["reply"] for r in resp.json()["results"]]
+        batch_s = time.perf_counter() - t0
+
+    mismatches = sum(a != b for a, b in zip(single, batch))
+    print(f"{len(messages)} messages ({args.requests} per workload), stub LLM delay {args.llm_delay_ms:.0f} ms")
+    print(f"  /chat one by one: {single_s * 1000:9.1f} ms  ({len(messages) / single_s:7.1f} msg/s)")
+    print(f"  /chat/batch:      {batch_s * 1000:9.1f} ms  ({len(messages) / batch_s:7.1f} msg/s)")
+    print(f"  speed-up: {single_s / batch_s:.1f}x, reply mismatches: {mismatches}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100, help="messages per workload")
+    parser.add_argument("--llm-delay-ms", type=float, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # must be set before llm.py / chatbot.py are imported
+    os.environ["LLM_BACKEND"] = "stub"
+    os.environ["LLM_STUB_DELAY_MS"] = str(args.llm_delay_ms)
+    os.environ["LLM_STUB_ERROR_RATE"] = "0"
+    os.environ["ANSWER_CACHE_FILE"] = ""
+    os.environ["RESPONSE_CACHE_SIZE"] = "0"
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
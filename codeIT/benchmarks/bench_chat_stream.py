@@ -0,0 +1,128 @@
+"""
+Time to first byte of /chat vs /chat/stream, against a streaming stub LLM.
+
+Starts the FastAPI app on a local uvicorn server (the ASGI test transport
+buffers whole responses) with LLM_BACKEND=stub, then sends the same rule and
+off-topic questions to both endpoints and reports, per kind, the mean time
+to the first reply text and to the complete reply. It also checks that the
+streamed text equals the /chat reply, that the session is updated when the
+stream ends and that a stream abandoned mid-answer leaves the session as it was.
+
+Run from the codeIT directory:
+    python -m benchmarks.bench_chat_stream --delay-ms 800
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+import time
+
+RULE_QUESTIONS = ["hi", "what are your working hours", "where are you located", "thank you"]
+LLM_QUESTIONS = [
+    "how do i reverse a linked list in c",
+    "explain big o notation with an example",
+    "what is a segmentation fault",
+    "how do python generators work",
+]
+
+
+def start_server():
+    import uvicorn
+
+    from backend.app import app
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def read_stream(client, message, session_id=None, stop_after=None):
+    """Returns (first text s, total s, streamed text, done payload or None)."""
+    start = time.perf_counter()
+    first, parts, done, event = None, [], None, None
+    async with client.stream("POST", "/chat/stream", json={"message": message, "session_id": session_id}) as r:
+        async for line in r.aiter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                data = json.loads(line[len("data: "):])
+                if event == "delta":
+                    first = first or time.perf_counter() - start
+                    parts.append(data["text"])
+                    if stop_after and len(parts) >= stop_after:
+                        break
+                elif event == "done":
+                    done = data
+    return first, time.perf_counter() - start, "".join(parts), done
+
+
+async def run(base_url):
+    import httpx
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        print(f"{'questions':<10} {'endpoint':<13} {'first text ms':>14} {'complete ms':>12}")
+        for kind, questions in (("rule", RULE_QUESTIONS), ("llm", LLM_QUESTIONS)):
+            plain, streamed = [], []
+            for q in questions:
+                start = time.perf_counter()
+                reply = (await client.post("/chat", json={"message": q})).json()["reply"]
+                elapsed = time.perf_counter() - start
+                plain.append((elapsed, elapsed))
+                first, total, text, done = await read_stream(client, q)
+                streamed.append((first, total))
+                if text != reply or done is None or done["reply"] != reply:
+                    raise SystemExit(f"streamed reply differs from /chat for {q!r}: {text!r} vs {reply!r}")
+            for label, timings in (("/chat", plain), ("/chat/stream", streamed)):
+                first = sum(t[0] for t in timings) / len(timings) * 1000
+                total = sum(t[1] for t in timings) / len(timings) * 1000
+                print(f"{kind:<10} {label:<13} {first:>14.1f} {total:>12.1f}")
+
+        # history is written once the stream is complete
+        _, _, _, done = await read_stream(client, LLM_QUESTIONS[0])
+        session_id = done["session_id"]
+        _, _, _, done = await read_stream(client, LLM_QUESTIONS[1], session_id)
+        ok = done["total_turns"] == 4 and done["history"][-1]["content"] == done["reply"]
+        print(f"\nsession after two streamed exchanges: {done['total_turns']} turns ({'ok' if ok else 'FAIL'})")
+
+        # a client that goes away mid-answer leaves the session unchanged
+        await read_stream(client, LLM_QUESTIONS[2], session_id, stop_after=1)
+        await asyncio.sleep(0.5)
+        after = (await client.post("/chat", json={"message": "hi", "session_id": session_id,
+                                                  "history_mode": "new"})).json()
+        abandoned_ok = after["total_turns"] == 6
+        print(f"session after an abandoned stream + /chat: {after['total_turns']} turns "
+              f"({'ok' if abandoned_ok else 'FAIL'})")
+        if not (ok and abandoned_ok):
+            raise SystemExit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--delay-ms", type=float, default=800)
+    args = parser.parse_args()
+
+    # must be set before llm.py / chatbot.py are imported
+    os.environ["LLM_BACKEND"] = "stub"
+    os.environ["LLM_STUB_DELAY_MS"] = str(args.delay_ms)
+    os.environ["LLM_STUB_ERROR_RATE"] = "0"
+    os.environ["ANSWER_CACHE_FILE"] = ""
+    os.environ["KB_RELOAD_INTERVAL_S"] = "0"
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    server, base_url = start_server()
+    try:
+        asyncio.run(run(base_url))
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
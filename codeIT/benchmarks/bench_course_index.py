@@ -0,0 +1,96 @@
+"""
+Benchmark: fuzzy course lookup via CourseIndex versus the per-category
+difflib.get_close_matches scan it replaced, on the real catalog and on
+synthetic catalogs of 100, 1k and 10k titles. Also checks both give the same
+course for every query.
+
+Run from the codeIT directory:
+    python -m benchmarks.bench_course_index
+"""
+import json
+import random
+import time
+from difflib import get_close_matches
+
+from course_index import CourseIndex
+
+WORDS = [
+    "python", "django", "react", "native", "mern", "stack", "flutter", "web", "design",
+    "graphic", "ui", "ux", "data", "science", "machine", "learning", "devops", "cloud",
+    "java", "spring", "boot", "php", "laravel", "node", "vue", "angular", "sql",
+    "database", "network", "security", "ethical", "hacking", "seo", "marketing",
+    "video", "editing", "motion", "excel", "office", "c++", "programming", "course",
+    "training", "advanced", "basic", "fullstack", "mobile", "app", "development", "ai",
+]
+
+QUERY_TEMPLATES = [
+    "{}", "{} course", "fees of {} course", "what is the price of {}",
+    "tell me about {} training", "i want to learn {}", "{} class timing",
+]
+
+
+def legacy_find(q, courses_info):
+    """The lookup chatbot() used before CourseIndex."""
+    for category, course_list in courses_info.items():
+        titles = [c["title"].lower() for c in course_list]
+        match = get_close_matches(q, titles, n=1, cutoff=0.5)
+        if match:
+            for c in course_list:
+                if (c.get("title") or "").lower() == match[0]:
+                    return c
+    return None
+
+
+def synthetic_catalog(n, seed=0):
+    rng = random.Random(seed)
+    categories = [f"category_{i}" for i in range(max(1, n // 50))]
+    courses = {cat: [] for cat in categories}
+    for i in range(n):
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))).title()
+        courses[rng.choice(categories)].append({"title": title, "price": f"Rs.{i}"})
+    return courses
+
+
+def queries_for(courses_info, n=200, seed=1):
+    rng = random.Random(seed)
+    titles = [c["title"] for cl in courses_info.values() for c in cl]
+    out = []
+    for _ in range(n):
+        subject = rng.choice(titles).lower() if rng.random() < 0.5 else rng.choice(WORDS)
+        out.append(rng.choice(QUERY_TEMPLATES).format(subject))
+    return out
+
+
+def timed(fn, queries):
+    start = time.perf_counter()
+    results = [fn(q) for q in queries]
+    return results, (time.perf_counter() - start) / len(queries) * 1e3
+
+
+def run(label, courses_info, queries):
+    t0 = time.perf_counter()
+    index = CourseIndex(courses_info)
+    build_ms = (time.perf_counter() - t0) * 1e3
+    old, old_ms = timed(lambda q: legacy_find(q, courses_info), queries)
+    new, new_ms = timed(index.find, queries)
+    mismatches = sum(1 for a, b in zip(old, new) if a is not b)
+    shortlist = sum(len(index.candidates(q)[0]) for q in queries) / len(queries)
+    print(f"{label:>10} {len(index):>7} {build_ms:>9.1f} {shortlist:>10.1f} "
+          f"{old_ms:>10.3f} {new_ms:>10.3f} {mismatches:>10}")
+    return mismatches
+
+
+def main():
+    print(f"{'catalog':>10} {'titles':>7} {'build ms':>9} {'shortlist':>10} "
+          f"{'difflib ms':>10} {'index ms':>10} {'mismatch':>10}")
+    with open("codeit_dataset.json", "r", encoding="utf-8") as f:
+        courses = json.load(f).get("courses", {})
+    failures = run("dataset", courses, queries_for(courses))
+    for n in (100, 1000, 10000):
+        catalog = synthetic_catalog(n)
+        failures += run(f"synth-{n}", catalog, queries_for(catalog, n=100))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,56 @@
+"""
+Benchmark: accuracy, size and search latency of the float16 and int8
+embedding stores against float32, on the KB embeddings in kb_embeddings.npy
+(the rows for kb_texts.json).
+
+Queries are each KB row itself plus noisy copies of it, so no encoder is needed.
+
+Run from the codeIT directory:
+    python -m benchmarks.bench_embedding_store
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from embedding_store import STORE_DTYPES, open_store, write_store
+from vector_index import VectorIndex, normalize_rows
+
+TOP_K = 3
+
+
+def main():
+    emb = np.load("kb_embeddings.npy")
+    texts = [str(i) for i in range(emb.shape[0])]
+    rng = np.random.default_rng(0)
+    noisy = normalize_rows(emb + 0.6 * rng.standard_normal(emb.shape) / np.sqrt(emb.shape[1]) * 4)
+    queries = np.concatenate([normalize_rows(emb), noisy])
+
+    reference = VectorIndex(emb, texts)
+    ref_scores = np.stack([reference.scores(q) for q in queries])
+    ref_top = [[r[2] for r in reference.search(q[None, :], TOP_K)] for q in queries]
+
+    print(f"KB rows: {emb.shape[0]}, dim: {emb.shape[1]}, queries: {len(queries)}")
+    print(f"{'dtype':>8} {'file KB':>8} {'max |err|':>10} {'mean |err|':>11} "
+          f"{'top1 agree':>11} {f'recall@{TOP_K}':>9} {'us/query':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for dtype in STORE_DTYPES:
+            path = os.path.join(tmp, f"kb.{dtype}.store")
+            write_store(path, texts, emb, dtype=dtype)
+            index = VectorIndex(open_store(path), texts)
+
+            err = np.abs(np.stack([index.scores(q) for q in queries]) - ref_scores)
+            t0 = time.perf_counter()
+            got = [[r[2] for r in index.search(q[None, :], TOP_K)] for q in queries]
+            us = (time.perf_counter() - t0) / len(queries) * 1e6
+
+            top1 = np.mean([g[0] == r[0] for g, r in zip(got, ref_top)])
+            recall = np.mean([len(set(g) & set(r)) / TOP_K for g, r in zip(got, ref_top)])
+            size_kb = os.path.getsize(path) / 1024
+            print(f"{dtype:>8} {size_kb:>8.1f} {err.max():>10.5f} {err.mean():>11.6f} "
+                  f"{top1:>11.3f} {recall:>9.3f} {us:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Dense-only vs hybrid (BM25 + embeddings) retrieval on a labeled query set.
+
+The labeled set is generated from codeit_dataset.json: reworded course price
+and detail questions, mentor and FAQ questions (each labeled with the KB
+answers that count as correct) and off-topic questions (correct when nothing
+is answered from the KB, i.e. the question goes on to the LLM).
+
+For each mode it reports, over the retrieval stage alone (quick rules and the
+course-name matcher switched off):
+    correct   answered directly with an acceptable KB answer
+    deferred  handed to the LLM (correct only for off-topic questions)
+    wrong     answered directly with a wrong KB answer
+    no encode share of questions answered without calling the encoder
+and the mean / p95 latency. It then runs the full pipeline (quick rules on)
+in hybrid mode to report how often the encoder is skipped end to end.
+
+Run from the codeIT directory:
+    python -m benchmarks.bench_hybrid_retrieval
+"""
+import os
+import time
+from collections import Counter
+
+import numpy as np
+
+OFF_TOPIC = [
+    "how do i reverse a linked list in c",
+    "explain big o notation with an example",
+    "what is the difference between tcp and udp",
+    "why does my javascript promise never resolve",
+    "how to center a div with css grid",
+    "what is a segmentation fault",
+    "how do python generators work",
+    "best way to learn data structures",
+]
+
+
+def build_labeled_set(dataset, kb_texts, kb_answers, kb_answer_ids):
+    def answers_for(*texts):
+        wanted = {t.lower() for t in texts}
+        return {kb_answers[a] for t, a in zip(kb_texts, kb_answer_ids) if t.lower() in wanted}
+
+    labeled = []
+    for category, courses in dataset.get("courses", {}).items():
+        for c in courses:
+            title = c.get("title", "").strip()
+            if not title:
+                continue
+            price = answers_for(f"price of {title}")
+            info = answers_for(title, f"what is {title}", f"{category} course {title}")
+            labeled += [
+                (f"what is the price of {title}", price),
+                (f"{title} fee", price | info),
+                (f"can you tell me about {title}", info),
+            ]
+
+    for m in dataset.get("company", {}).get("mentors", []):
+        if m.get("name"):
+            labeled.append((f"tell me about {m['name']}", answers_for(f"who is {m['name']}")))
+
+    for key, phrasing in [
+        ("online classes", "do you have online classes"),
+        ("refund", "what is your refund policy"),
+        ("internship", "is there an internship"),
+        ("payment methods", "which payment methods are accepted"),
+        ("support", "do you give support after the course"),
+        ("enroll", "how can i enroll"),
+        ("working hours", "what are your working hours"),
+        ("course duration", "what is the course duration"),
+    ]:
+        labeled.append((phrasing, answers_for(key)))
+
+    labeled += [(q, None) for q in OFF_TOPIC]
+    return [(q, label) for q, label in labeled if label is None or label]
+
+
+def evaluate(chatbot, labeled, mode):
+    import metrics
+
+    chatbot.RETRIEVAL_MODE = mode
+    outcome, skipped, latencies = Counter(), 0, []
+    for question, label in labeled:
+        start = time.perf_counter()
+        with metrics.request(question) as trace:
+            answer, _ = chatbot.prepare_answer(question)
+        latencies.append(time.perf_counter() - start)
+        skipped += "encode" not in trace.stages
+        if answer is None:
+            outcome["correct" if label is None else "deferred"] += 1
+        else:
+            outcome["correct" if label and answer in label else "wrong"] += 1
+    ms = np.array(latencies) * 1e3
+    return outcome, skipped, ms
+
+
+def main():
+    os.environ["ANSWER_CACHE_FILE"] = ""
+    import chatbot
+    import metrics
+    from benchmarks.pipeline_suite import build_workloads
+    from utils import query_cache
+
+    metrics.METRICS_ENABLED = True
+    kb = chatbot.current_snapshot()
+    labeled = build_labeled_set(kb.dataset, kb.texts, kb.answers, kb.answer_ids)
+    chatbot.warm_up()
+    print(f"{len(labeled)} labeled questions ({sum(label is None for _, label in labeled)} off-topic)\n")
+
+    quick_answer = chatbot.quick_answer
+    chatbot.quick_answer = lambda question, kb: (None, None)
+    print(f"{'mode':<8} {'correct':>8} {'deferred':>9} {'wrong':>6} {'no encode':>10} {'mean ms':>8} {'p95 ms':>7}")
+    for mode in ("dense", "hybrid"):
+        query_cache.clear()
+        outcome, skipped, ms = evaluate(chatbot, labeled, mode)
+        n = len(labeled)
+        print(
+            f"{mode:<8} {outcome['correct'] / n:>8.1%} {outcome['deferred'] / n:>9.1%} {outcome['wrong'] / n:>6.1%} "
+            f"{skipped / n:>10.1%} {ms.mean():>8.2f} {np.percentile(ms, 95):>7.2f}"
+        )
+    chatbot.quick_answer = quick_answer
+
+    # end to end, with quick rules and the course matcher in front
+    chatbot.RETRIEVAL_MODE = "hybrid"
+    questions = [q for queries in build_workloads(100).values() for q in queries]
+    branches = Counter()
+    for q in questions:
+        with metrics.request(q) as trace:
+            chatbot.prepare_answer(q)
+        branches["no encode" if "encode" not in trace.stages else "encode"] += 1
+    print(f"\nfull pipeline (pipeline_suite workloads): encoder skipped for "
+          f"{branches['no encode'] / len(questions):.1%} of {len(questions)} questions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Flat KB lists vs the answer-grouped KB (kbuilder.build_kb_index_from_dataset).
+
+Memory: answer strings held in RAM and the size of the artifact's JSON
+section, flat (one answer copy per text) vs grouped (each answer once plus a
+row -> answer id array). Search: top-k over flat rows (often several
+paraphrases of one answer) vs top-k over answer groups, on the real KB and on
+a synthetic large KB.
+
+Run from the codeIT directory:
+    python -m benchmarks.bench_kb_grouping
+"""
+import json
+import sys
+import time
+
+import numpy as np
+
+from kbuilder import build_kb_index_from_dataset, build_kb_texts_from_dataset
+from vector_index import VectorIndex
+
+
+def strings_bytes(strings):
+    return sys.getsizeof(strings) + sum(sys.getsizeof(s) for s in strings)
+
+
+def time_search(index, queries, top_k, repeats=3):
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        results = [index.search(q[None, :], top_k) for q in queries]
+        best = min(best, time.perf_counter() - t0)
+    return best / len(queries) * 1e6, results
+
+
+def distinct(results, answer_of):
+    return np.mean([len({answer_of[i] for _, _, i in r}) for r in results])
+
+
+def compare(label, flat_emb, flat_answers, grouped_emb, answer_ids, queries, top_k):
+    flat = VectorIndex(flat_emb, [str(i) for i in range(len(flat_emb))])
+    grouped = VectorIndex(grouped_emb, [str(i) for i in range(len(grouped_emb))], groups=answer_ids)
+    flat_us, flat_res = time_search(flat, queries, top_k)
+    grouped_us, grouped_res = time_search(grouped, queries, top_k)
+    print(f"\n{label}: {len(flat_emb)} flat rows, {len(grouped_emb)} grouped rows, "
+          f"{int(np.max(answer_ids)) + 1} answers; top-{top_k}")
+    print(f"  flat    {flat_us:8.1f} us/query, distinct answers in top-{top_k}: "
+          f"{distinct(flat_res, flat_answers):.2f}")
+    print(f"  grouped {grouped_us:8.1f} us/query, distinct answers in top-{top_k}: "
+          f"{distinct(grouped_res, answer_ids):.2f}")
+
+
+def main():
+    from utils import encode_queries, load_json
+
+    dataset = load_json("codeit_dataset.json")
+    flat_texts, flat_answers = build_kb_texts_from_dataset(dataset)
+    answers, texts, answer_ids = build_kb_index_from_dataset(dataset)
+
+    flat_json = len(json.dumps({"texts": flat_texts, "answers": flat_answers}, ensure_ascii=False).encode())
+    grouped_json = len(json.dumps(
+        {"texts": texts, "answers": answers, "answer_ids": answer_ids}, ensure_ascii=False
+    ).encode())
+    print(f"{'':<10} {'rows':>6} {'answers':>8} {'answer RAM':>12} {'artifact JSON':>14}")
+    print(f"{'flat':<10} {len(flat_texts):>6} {len(flat_answers):>8} "
+          f"{strings_bytes(flat_answers) / 1024:>10.1f}KB {flat_json / 1024:>12.1f}KB")
+    print(f"{'grouped':<10} {len(texts):>6} {len(answers):>8} "
+          f"{(strings_bytes(answers) + len(answer_ids) * 4) / 1024:>10.1f}KB {grouped_json / 1024:>12.1f}KB")
+
+    # real KB: the flat lists map each row to its own answer copy
+    emb_by_text = dict(zip(texts, encode_queries(texts)))
+    flat_emb = np.stack([emb_by_text[t] for t in flat_texts])
+    answer_index = {a: i for i, a in enumerate(answers)}
+    flat_answer_ids = [answer_index[a] for a in flat_answers]
+    queries = encode_queries([f"tell me about {t}" for t in texts[:100]])
+    compare("real KB", flat_emb, flat_answer_ids, np.stack([emb_by_text[t] for t in texts]),
+            np.array(answer_ids), queries, top_k=3)
+
+    # synthetic large KB: ~5 paraphrase rows per answer
+    rng = np.random.default_rng(0)
+    n_answers, dim = 20_000, flat_emb.shape[1]
+    centers = rng.normal(size=(n_answers, dim)).astype(np.float32)
+    synth_ids = np.sort(rng.integers(0, n_answers, n_answers * 5))
+    synth = centers[synth_ids] + 0.3 * rng.normal(size=(len(synth_ids), dim)).astype(np.float32)
+    compare("synthetic KB", synth, synth_ids, synth, synth_ids,
+            centers[rng.integers(0, n_answers, 200)], top_k=3)
+
+
+if __name__ == "__main__":
+    main()
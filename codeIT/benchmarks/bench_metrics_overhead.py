@@ -0,0 +1,98 @@
+"""
+Cost of the request instrumentation (metrics.py).
+
+Times get_ai_response on the cheapest paths (rule and course-name answers,
+where fixed per-request overhead matters most), on BM25 answers and on
+semantic answers that go through encode and search (dense retrieval), with
+metrics enabled and disabled, plus the bare cost of timed() in both modes.
+Each workload is checked to be answered by its branch before it is timed.
+
+Run from the codeIT directory:
+    python -m benchmarks.bench_metrics_overhead --rounds 2000
+"""
+import argparse
+import os
+import time
+
+import metrics
+
+# name -> (retrieval mode, questions, branch that must answer them)
+WORKLOADS = {
+    "rule": ("hybrid", ["hello", "contact number", "who is the ceo", "demo class"], "rule"),
+    "course": ("hybrid", ["python programming price", "data science course", "vue.js course fee"], "course"),
+    "lexical": ("hybrid", ["who is ashish shakya", "who is milan rai", "who is sita katuwal"], "lexical"),
+    "semantic": ("dense", ["who is ashish shakya", "who is milan rai", "who is sita katuwal"], "semantic"),
+}
+
+
+def check_branches(chatbot):
+    """Exits if a workload question is not answered by its workload's branch."""
+    for name, (mode, questions, branch) in WORKLOADS.items():
+        chatbot.RETRIEVAL_MODE = mode
+        for q in questions:
+            with metrics.request(q) as trace:
+                chatbot.get_ai_response(q)
+            if trace.answered_by != branch:
+                raise SystemExit(f"{name} workload: {q!r} answered by {trace.answered_by}, expected {branch}")
+
+
+def per_call_us(fn, items, rounds):
+    for item in items:  # warm caches
+        fn(item)
+    best = float("inf")
+    for _ in range(5):
+        t0 = time.perf_counter()
+        for i in range(rounds):
+            fn(items[i % len(items)])
+        best = min(best, time.perf_counter() - t0)
+    return best / rounds * 1e6
+
+
+def timed_loop(n):
+    for _ in range(n):
+        with metrics.timed("x"):
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    # must be set before llm.py / chatbot.py are imported: repeats must run the
+    # pipeline rather than hit the response cache, and nothing may call Gemini
+    os.environ["LLM_BACKEND"] = "stub"
+    os.environ["ANSWER_CACHE_FILE"] = ""
+    os.environ["RESPONSE_CACHE_SIZE"] = "0"
+    import chatbot
+
+    metrics.METRICS_ENABLED = True
+    check_branches(chatbot)
+    results = {False: {}, True: {}}
+    for enabled in (False, True):
+        metrics.METRICS_ENABLED = enabled
+        for name, (mode, questions, _) in WORKLOADS.items():
+            chatbot.RETRIEVAL_MODE = mode
+            results[enabled][name] = per_call_us(chatbot.get_ai_response, questions, args.rounds)
+
+    print(f"{'path':<10} {'disabled':>12} {'enabled':>12} {'overhead':>12}")
+    for name in WORKLOADS:
+        off, on = results[False][name], results[True][name]
+        print(f"{name:<10} {off:>10.1f}us {on:>10.1f}us {on - off:>+10.2f}us")
+
+    n = 200_000
+    for label, trace in (("timed() outside a request", False), ("timed() inside a request", True)):
+        metrics.METRICS_ENABLED = True
+        if trace:
+            with metrics.request("bench"):
+                t0 = time.perf_counter()
+                timed_loop(n)
+        else:
+            t0 = time.perf_counter()
+            timed_loop(n)
+        print(f"{label:<26} {(time.perf_counter() - t0) / n * 1e9:8.0f} ns/call")
+    metrics.registry.reset()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Legacy f-string prompt vs llm.PromptBuilder on LLM-bound questions.
+
+Both prompts are built from the same retrievals, and the history is a
+synthetic conversation of 0-12 turns mixing short questions, KB answers and
+long LLM answers. The legacy prompt holds the bare retrieved KB texts and
+the last six turns in full. The new prompt holds the retrieved question and
+answer blocks and fits them and the history into LLM_PROMPT_BUDGET_TOKENS.
+
+The run reports the estimated prompt tokens (mean / p95 / max) and the
+build time. On the labeled questions from bench_hybrid_retrieval that retrieval
+hands to the LLM, it also reports how often an acceptable KB answer is in
+the prompt at all.
+
+Run from the codeIT directory:
+    python -m benchmarks.bench_prompt_builder --budget 1024
+"""
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+
+LONG_REPLY = (
+    "Here is a step-by-step explanation with an example. First, define the data structure and "
+    "the operations you need. Then walk through each case, including the edge cases, and check "
+    "the complexity of every step before optimizing. "
+) * 6
+
+
+def legacy_prompt(query, context="", history=None):
+    """The prompt generate_llm_answer used to build on every call."""
+    from llm import PROMPT_PREAMBLE
+
+    history_text = ""
+    if history:
+        history_text = "Conversation History:\n" + "\n".join(
+            [f"{turn['role']}: {turn['content']}" for turn in history[-6:]]
+        )
+    return f"""{PROMPT_PREAMBLE}
+{history_text}
+
+### Context:
+{context}
+
+### User Question:
+{query}
+
+### Final Answer:
+"""
+
+
+def synthetic_history(rng, kb):
+    turns = []
+    for _ in range(rng.randrange(0, 7)):
+        turns.append({"role": "user", "content": rng.choice(kb.texts)})
+        reply = rng.choice([rng.choice(kb.answers), LONG_REPLY])
+        turns.append({"role": "assistant", "content": reply})
+    return turns
+
+
+def timed_build(build, *args):
+    start = time.perf_counter()
+    prompt = build(*args)
+    return prompt, (time.perf_counter() - start) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=int, default=None, help="token budget (default LLM_PROMPT_BUDGET_TOKENS)")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.environ["ANSWER_CACHE_FILE"] = ""
+    import chatbot
+    from benchmarks.bench_hybrid_retrieval import build_labeled_set
+    from benchmarks.pipeline_suite import build_workloads
+    from llm import PromptBuilder, estimate_tokens, prompt_builder
+
+    builder = PromptBuilder(args.budget, prompt_builder.max_history_turns) if args.budget else prompt_builder
+    kb = chatbot.current_snapshot()
+    rng = random.Random(args.seed)
+    workloads = build_workloads(args.requests, seed=args.seed)
+    questions = workloads["off_topic"] + workloads["semantic"]
+
+    rows = {"legacy": ([], []), "builder": ([], [])}
+    dropped = {"context_blocks": 0, "history_turns": 0}
+    prepared = 0
+    for q in questions:
+        answer, retrieval = chatbot.prepare_answer(q, kb)
+        if answer is not None or retrieval is None:
+            continue
+        prepared += 1
+        history = synthetic_history(rng, kb)
+        texts = "\n".join(kb.texts[i] for i in retrieval["kb_ids"])
+        prompt, us = timed_build(legacy_prompt, q, texts, history)
+        rows["legacy"][0].append(estimate_tokens(prompt))
+        rows["legacy"][1].append(us)
+        (prompt, size), us = timed_build(builder.build, q, retrieval["context"], history)
+        rows["builder"][0].append(size["tokens"])
+        rows["builder"][1].append(us)
+        dropped["context_blocks"] += size["context_blocks_dropped"]
+        dropped["history_turns"] += size["history_turns_dropped"]
+
+    print(f"{prepared} LLM-bound questions, budget {builder.budget_tokens} tokens, "
+          f"preamble {builder.preamble_tokens} tokens")
+    print(f"{'prompt':<8} {'mean tok':>9} {'p95 tok':>8} {'max tok':>8} {'build us':>9}")
+    for name, (tokens, us) in rows.items():
+        tokens = np.array(tokens)
+        print(f"{name:<8} {tokens.mean():>9.0f} {np.percentile(tokens, 95):>8.0f} {tokens.max():>8.0f} "
+              f"{np.mean(us):>9.1f}")
+    print(f"dropped by the budget: {dropped['context_blocks']} context blocks, {dropped['history_turns']} history turns")
+
+    # does the prompt carry an acceptable answer for questions retrieval could not answer?
+    labeled = build_labeled_set(kb.dataset, kb.texts, kb.answers, kb.answer_ids)
+    deferred = legacy_hits = builder_hits = 0
+    for q, label in labeled:
+        if not label:
+            continue
+        answer, retrieval = chatbot.prepare_answer(q, kb)
+        if answer is not None or retrieval is None:
+            continue
+        deferred += 1
+        texts = "\n".join(kb.texts[i] for i in retrieval["kb_ids"])
+        legacy_hits += any(a in legacy_prompt(q, texts) for a in label)
+        builder_hits += any(a in builder.build(q, retrieval["context"])[0] for a in label)
+    if deferred:
+        print(f"\n{deferred} labeled questions deferred to the LLM; acceptable answer in prompt: "
+              f"legacy {legacy_hits / deferred:.0%}, builder {builder_hits / deferred:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Exact response cache (response_cache.py) on a repeated-question workload.
+
+Builds a traffic-like stream from the pipeline_suite workloads, where each
+question is asked several times with different case and surrounding
+spaces. It sends that stream through get_ai_response with the cache off
+and on, and reports mean and p95 latency, per-branch hit rates, and whether
+every reply matched the uncached reply. It also checks that LLM replies are never stored and
+that a dataset change (on a temporary copy) empties the cache.
+
+Run from the codeIT directory:
+    python -m benchmarks.bench_response_cache --requests 50 --repeats 4
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+
+def variants(question, rng):
+    return rng.choice([question, question.upper(), f"  {question} ", question.capitalize()])
+
+
+def run(get_ai_response, stream):
+    replies, latencies = [], []
+    for q in stream:
+        start = time.perf_counter()
+        replies.append(get_ai_response(q))
+        latencies.append(time.perf_counter() - start)
+    return replies, np.array(latencies) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50, help="distinct questions per workload")
+    parser.add_argument("--repeats", type=int, default=4, help="times each question is asked")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # must be set before llm.py / chatbot.py are imported
+    os.environ["LLM_BACKEND"] = "stub"
+    os.environ["LLM_STUB_DELAY_MS"] = "0"
+    os.environ["ANSWER_CACHE_FILE"] = ""
+    import chatbot
+    from benchmarks.pipeline_suite import build_workloads
+    from utils import load_json, query_cache, save_json
+
+    chatbot.warm_up()
+    rng = random.Random(args.seed)
+    questions = [q for qs in build_workloads(args.requests, seed=args.seed).values() for q in qs]
+    stream = [variants(q, rng) for q in questions for _ in range(args.repeats)]
+    rng.shuffle(stream)
+
+    cache = chatbot.response_cache
+    chatbot.response_cache = None
+    query_cache.clear()
+    baseline, off_ms = run(chatbot.get_ai_response, stream)
+    chatbot.response_cache = cache
+    query_cache.clear()
+    replies, on_ms = run(chatbot.get_ai_response, stream)
+
+    mismatches = sum(a != b for a, b in zip(baseline, replies))
+    print(f"{len(stream)} requests ({len(questions)} questions, {len(set(questions))} distinct, "
+          f"x {args.repeats} with case/space variants)")
+    print(f"{'cache':<6} {'mean ms':>8} {'p95 ms':>8}")
+    for label, ms in (("off", off_ms), ("on", on_ms)):
+        print(f"{label:<6} {ms.mean():>8.3f} {np.percentile(ms, 95):>8.3f}")
+
+    stats = cache.stats()
+    print(f"\n{'branch':<10} {'hits':>6} {'misses':>7} {'hit rate':>9}")
+    for branch, b in sorted(stats["branches"].items()):
+        print(f"{branch:<10} {b['hits']:>6} {b['misses']:>7} {b['hit_rate']:>9.1%}")
+    print(f"{'(llm etc.)':<10} {'':>6} {stats['uncached']:>7} {'never':>9}")
+    print(f"\noverall hit rate {stats['hit_rate']:.1%}, {stats['size']} entries, "
+          f"reply mismatches vs uncached: {mismatches}")
+
+    stored = {reply for reply, _ in cache._entries.values()}
+    llm_cached = sum(r in stored for r in replies if r.startswith("[stub answer]"))
+    workdir = tempfile.mkdtemp(prefix="response_cache_")
+    try:
+        chatbot.DATA_FILE = os.path.join(workdir, "codeit_dataset.json")
+        chatbot.ARTIFACT_FILE = os.path.join(workdir, "kb_artifact.store")
+        dataset = load_json("codeit_dataset.json")
+        course = next(iter(dataset["courses"].values()))[0]
+        course["price"] = "Rs.1"
+        save_json(chatbot.DATA_FILE, dataset)
+        chatbot.reload_kb()
+        emptied = len(cache)
+        fresh = "Rs.1" in chatbot.get_ai_response(f"{course['title']} price")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print(f"LLM replies in cache: {llm_cached}; entries after a dataset change: {emptied}; "
+          f"new price served: {fresh}")
+    if mismatches or llm_cached or emptied or not fresh:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Microbenchmark: per-query rule latency of the sequential `any(p in q)` chain
+versus the compiled automaton, as the rule table grows.
+
+Run from the codeIT directory:
+    python -m benchmarks.bench_rules
+"""
+import random
+import string
+import time
+
+from rules import RULES, compile_rules, match_rules
+
+QUERIES = [
+    "hello", "what is the price of python course", "who is the ceo", "contact details",
+    "do you give certificate", "i want to learn react native", "how are you",
+    "projects in mern stack", "where is codeit", "something completely unrelated to rules",
+]
+
+
+def synthetic_rules(n, seed=0):
+    """The real table followed by n - len(RULES) random filler rules."""
+    rng = random.Random(seed)
+    rules = list(RULES)
+    while len(rules) < n:
+        phrases = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 12)))
+                   for _ in range(rng.randint(1, 6))]
+        rules.append({"name": f"filler_{len(rules)}", "phrases": phrases, "answer": "filler"})
+    return rules
+
+
+def naive_match(q, rules):
+    for rule in rules:
+        if any(p in q for p in rule.get("exclude", [])):
+            continue
+        if q.startswith(tuple(rule.get("prefixes", []))) or any(p in q for p in rule.get("phrases", [])):
+            return rule
+    return None
+
+
+def per_query_us(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for q in QUERIES:
+            fn(q)
+    return (time.perf_counter() - start) / (repeat * len(QUERIES)) * 1e6
+
+
+def main(sizes=(len(RULES), 50, 200, 1000, 5000), repeat=200):
+    print(f"{'rules':>6} {'phrases':>8} {'chain us/q':>11} {'automaton us/q':>15} {'compile ms':>11}")
+    for n in sizes:
+        rules = synthetic_rules(n)
+        t0 = time.perf_counter()
+        compiled = compile_rules(rules)
+        compile_ms = (time.perf_counter() - t0) * 1e3
+        for q in QUERIES:
+            assert naive_match(q, rules) is match_rules(q, rules, compiled), q
+        chain = per_query_us(lambda q: naive_match(q, rules), repeat)
+        auto = per_query_us(lambda q: match_rules(q, rules, compiled), repeat)
+        n_phrases = len(compiled[1])
+        print(f"{n:>6} {n_phrases:>8} {chain:>11.2f} {auto:>15.2f} {compile_ms:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark: VectorIndex exact and IVF search versus the previous full-argsort
+search, reporting per-query latency and recall@k against exact search.
+
+Uses the cached kb_embeddings.npy plus synthetic clustered KBs, so it runs
+without loading the sentence-transformer model.
+
+Run from the codeIT directory:
+    python -m benchmarks.bench_vector_index
+"""
+import time
+
+import numpy as np
+
+from vector_index import VectorIndex, normalize_rows
+
+TOP_K = 3
+
+
+def legacy_search(q_emb, kb_embeddings, top_k):
+    """What utils.semantic_search did: cosine against every row, full argsort."""
+    q = q_emb / np.linalg.norm(q_emb)
+    kb = kb_embeddings / np.linalg.norm(kb_embeddings, axis=1, keepdims=True)
+    scores = kb @ q[0]
+    return np.argsort(-scores)[:top_k]
+
+
+def synthetic_kb(n, dim=384, n_topics=None, seed=0):
+    rng = np.random.default_rng(seed)
+    n_topics = n_topics or max(8, n // 40)
+    topics = normalize_rows(rng.standard_normal((n_topics, dim)))
+    rows = topics[rng.integers(n_topics, size=n)] + 0.35 * rng.standard_normal((n, dim)) / np.sqrt(dim) * 4
+    return normalize_rows(rows)
+
+
+def make_queries(kb, n, seed=1):
+    rng = np.random.default_rng(seed)
+    picks = kb[rng.integers(kb.shape[0], size=n)]
+    return normalize_rows(picks + 0.5 * rng.standard_normal(picks.shape) / np.sqrt(kb.shape[1]) * 4)
+
+
+def per_query_ms(fn, queries):
+    start = time.perf_counter()
+    out = [fn(q[None, :]) for q in queries]
+    return out, (time.perf_counter() - start) / len(queries) * 1e3
+
+
+def run(label, kb, n_queries=200):
+    texts = [str(i) for i in range(kb.shape[0])]
+    queries = make_queries(kb, n_queries)
+    exact = VectorIndex(kb, texts)
+
+    _, legacy_ms = per_query_ms(lambda q: legacy_search(q, kb, TOP_K), queries)
+    truth, exact_ms = per_query_ms(lambda q: {r[2] for r in exact.search(q, TOP_K)}, queries)
+    print(f"{label:>12} {'legacy':>14} {'':>8} {legacy_ms:>9.3f}")
+    print(f"{label:>12} {'exact':>14} {'':>8} {exact_ms:>9.3f} {1.0:>9.3f}")
+
+    t0 = time.perf_counter()
+    ivf = VectorIndex(kb, texts, mode="ivf")
+    build_ms = (time.perf_counter() - t0) * 1e3
+    for n_probe in (1, 4, 16):
+        ivf.n_probe = n_probe
+        got, ivf_ms = per_query_ms(lambda q: {r[2] for r in ivf.search(q, TOP_K)}, queries)
+        recall = np.mean([len(g & t) / len(t) for g, t in zip(got, truth)])
+        print(f"{label:>12} {f'ivf probe={n_probe}':>14} {build_ms:>8.0f} {ivf_ms:>9.3f} {recall:>9.3f}")
+
+
+def main():
+    print(f"{'kb':>12} {'mode':>14} {'build ms':>8} {'ms/query':>9} {f'recall@{TOP_K}':>9}")
+    run("kb-232", np.load("kb_embeddings.npy"))
+    for n in (10_000, 100_000):
+        run(f"synth-{n // 1000}k", synthetic_kb(n))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Check for KB hot reload (chatbot.reload_kb, kb_reloader.DatasetWatcher).
+
+Works on a temporary copy of codeit_dataset.json and its own artifact file,
+changes a course price and asserts that:
+    - an unchanged dataset is not rebuilt, a changed one is swapped in
+    - a request that started before the swap finishes on the old snapshot
+    - requests running during repeated reloads never fail or mix snapshots
+    - a dataset that fails to build leaves the current snapshot serving
+    - the watcher picks up an edit without a request paying for the rebuild
+    - GET /admin/kb and POST /admin/reload report the snapshot
+
+Run from the codeIT directory (exits non-zero on failure):
+    python -m benchmarks.check_kb_reload
+"""
+import asyncio
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+
+from utils import load_json, save_json
+
+
+def check(label, ok, detail=""):
+    print(f"  [{'ok' if ok else 'FAIL'}] {label}{': ' + detail if detail else ''}")
+    if not ok:
+        raise SystemExit(1)
+
+
+def set_price(data_file, title, price):
+    dataset = load_json(data_file)
+    for courses in dataset["courses"].values():
+        for c in courses:
+            if c.get("title") == title:
+                c["price"] = price
+    save_json(data_file, dataset)
+
+
+def reload_checks(chatbot, data_file, title):
+    question = f"{title} price"
+    old = chatbot.get_ai_response(question)
+    check("unchanged dataset -> no rebuild", chatbot.reload_kb()["reloaded"] is False)
+
+    # a request pinned to the old snapshot, held up until the reload is done
+    if chatbot.response_cache is not None:
+        chatbot.response_cache.clear()
+    release = threading.Event()
+    prepare_answer = chatbot.prepare_answer
+
+    def held(q, kb=None):
+        release.wait(10)
+        return prepare_answer(q, kb)
+
+    chatbot.prepare_answer = held
+    in_flight = {}
+    worker = threading.Thread(target=lambda: in_flight.setdefault("reply", chatbot.chatbot(question)))
+    worker.start()
+    time.sleep(0.05)
+    chatbot.prepare_answer = prepare_answer
+
+    set_price(data_file, title, "Rs.1")
+    info = chatbot.reload_kb()
+    new = chatbot.get_ai_response(question)
+    release.set()
+    worker.join()
+    check("changed dataset -> new snapshot", info["reloaded"] and "Rs.1" in new,
+          f"{info['build_seconds']:.3f}s build")
+    check("in-flight request finished on the old snapshot", in_flight.get("reply") == old)
+
+    # concurrent requests while the dataset flips back and forth
+    stop, replies, errors = threading.Event(), [], []
+
+    def client():
+        while not stop.is_set():
+            try:
+                replies.append(chatbot.get_ai_response(question))
+            except Exception as exc:  # noqa: BLE001 - any failure fails the check
+                errors.append(exc)
+
+    clients = [threading.Thread(target=client) for _ in range(4)]
+    for t in clients:
+        t.start()
+    for i in range(6):
+        set_price(data_file, title, f"Rs.{i + 2}")
+        chatbot.reload_kb()
+    stop.set()
+    for t in clients:
+        t.join()
+    valid = {"Rs.1"} | {f"Rs.{i + 2}" for i in range(6)}
+    mixed = [r for r in replies if len(set(re.findall(r"Rs\.[\d,]+", r)) & valid) != 1]
+    check(f"{len(replies)} requests during 6 reloads: no errors", not errors, repr(errors[:1]))
+    check("every reply came from exactly one snapshot", not mixed, repr(mixed[:1]))
+
+    # a broken dataset keeps the current snapshot
+    version = chatbot.current_snapshot().version
+    with open(data_file, encoding="utf-8") as f:
+        good = f.read()
+    with open(data_file, "w", encoding="utf-8") as f:
+        f.write("{ not json")
+    try:
+        chatbot.reload_kb()
+        failed = False
+    except Exception:  # noqa: BLE001
+        failed = True
+    with open(data_file, "w", encoding="utf-8") as f:
+        f.write(good)
+    check("broken dataset -> reload fails, old snapshot kept",
+          failed and chatbot.current_snapshot().version == version)
+
+
+def watcher_check(chatbot, data_file, title):
+    from kb_reloader import DatasetWatcher
+
+    set_price(data_file, title, "Rs.100")
+    chatbot.reload_kb()
+    watcher = DatasetWatcher(data_file, chatbot.reload_kb, interval=0.05).start()
+    try:
+        os.utime(data_file)  # touched, not changed
+        time.sleep(0.2)
+        version = chatbot.current_snapshot().version
+        start = time.perf_counter()
+        set_price(data_file, title, "Rs.200")
+        while chatbot.current_snapshot().version == version and time.perf_counter() - start < 30:
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - start
+    finally:
+        watcher.stop()
+    check("watcher swapped in the edited dataset", "Rs.200" in chatbot.get_ai_response(f"{title} price"),
+          f"{elapsed * 1000:.0f} ms after the edit")
+
+
+async def admin_check(chatbot, data_file, title):
+    import httpx
+
+    from backend.app import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://check") as client:
+        before = (await client.get("/admin/kb")).json()
+        serving = chatbot.current_snapshot().version == before["version"]
+        set_price(data_file, title, "Rs.300")
+        reloaded = (await client.post("/admin/reload")).json()
+        again = (await client.post("/admin/reload")).json()
+        forced = (await client.post("/admin/reload", params={"force": "true"})).json()
+    check("GET /admin/kb reports the serving snapshot", serving, before["built_at"])
+    check("POST /admin/reload swaps, then skips an unchanged dataset",
+          reloaded["reloaded"] and not again["reloaded"] and again["version"] == reloaded["version"])
+    check("POST /admin/reload?force=true rebuilds", forced["reloaded"] and forced["version"] == reloaded["version"],
+          f"{forced['build_seconds']:.3f}s build, {forced['texts']} texts, {forced['answers']} answers")
+
+
+def main():
+    # must be set before llm.py / chatbot.py are imported
+    os.environ["LLM_BACKEND"] = "stub"
+    os.environ["ANSWER_CACHE_FILE"] = ""
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    import chatbot
+
+    workdir = tempfile.mkdtemp(prefix="kb_reload_")
+    try:
+        data_file = os.path.join(workdir, "codeit_dataset.json")
+        shutil.copy(chatbot.DATA_FILE, data_file)
+        chatbot.DATA_FILE = data_file
+        chatbot.ARTIFACT_FILE = os.path.join(workdir, "kb_artifact.store")
+        chatbot.reload_kb(force=True)
+        title = next(iter(chatbot.current_snapshot().dataset["courses"].values()))[0]["title"]
+
+        print("reload_kb")
+        reload_checks(chatbot, data_file, title)
+        print("DatasetWatcher")
+        watcher_check(chatbot, data_file, title)
+        print("admin endpoints")
+        asyncio.run(admin_check(chatbot, data_file, title))
+        print("all checks passed")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
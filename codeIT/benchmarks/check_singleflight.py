@@ -0,0 +1,144 @@
+"""
+Concurrency check for LLM request coalescing (singleflight.py, llm.py).
+
+With a slow stub LLM it fires N concurrent identical requests and asserts
+that exactly one upstream call is made, for:
+    - AsyncLLMClient.generate (differently cased / spaced copies of a question)
+    - failing upstream calls (the error reaches every caller)
+    - callers cancelled mid-flight, including the leader (the call survives)
+    - generate_llm_answer from N threads
+    - POST /chat through the FastAPI app
+
+Run from the codeIT directory (exits non-zero on failure):
+    python -m benchmarks.check_singleflight --n 50
+"""
+import argparse
+import asyncio
+import logging
+import os
+import threading
+
+
+def check(label, ok, detail=""):
+    print(f"  [{'ok' if ok else 'FAIL'}] {label}{': ' + detail if detail else ''}")
+    if not ok:
+        raise SystemExit(1)
+
+
+async def async_checks(n, delay_ms):
+    from llm import AsyncLLMClient, CircuitBreaker
+    from llm_stub import StubLLMBackend
+    from singleflight import AsyncSingleFlight
+
+    # identical (after normalization) concurrent questions
+    stub = StubLLMBackend(delay_ms=delay_ms, error_rate=0)
+    client = AsyncLLMClient(stub, max_concurrency=4, timeout=10)
+    variants = ["How do I reverse a list?", "how do i reverse a list?", "  how do I   reverse a list? "]
+    results = await asyncio.gather(*(client.generate(variants[i % 3], "ctx") for i in range(n)))
+    check(f"{n} identical requests -> upstream calls", stub.calls == 1, str(stub.calls))
+    check("every caller got the shared answer", len(set(results)) == 1 and results[0] is not None)
+
+    # different context is a different request
+    await asyncio.gather(client.generate("same question", "ctx a"), client.generate("same question", "ctx b"))
+    check("different context -> separate calls", stub.calls == 3, str(stub.calls))
+
+    # errors reach every caller
+    flight = AsyncSingleFlight()
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(delay_ms / 1000)
+        raise RuntimeError("upstream failed")
+
+    outcomes = await asyncio.gather(*(flight.do("k", failing) for _ in range(n)), return_exceptions=True)
+    check(
+        f"{n} callers of a failing call -> upstream calls", calls == 1, str(calls)
+    )
+    check("every caller got the error", all(isinstance(o, RuntimeError) for o in outcomes))
+
+    failing_stub = StubLLMBackend(delay_ms=delay_ms, error_rate=1.0)
+    failing_client = AsyncLLMClient(failing_stub, timeout=10, breaker=CircuitBreaker(min_calls=1000))
+    results = await asyncio.gather(*(failing_client.generate("q", "ctx") for _ in range(n)))
+    check("client: failing call shared, every caller falls back",
+          failing_stub.calls == 1 and all(r is None for r in results), f"calls={failing_stub.calls}")
+
+    # cancelled callers (including the leader) do not cancel the shared call
+    stub = StubLLMBackend(delay_ms=delay_ms, error_rate=0)
+    client = AsyncLLMClient(stub, timeout=10)
+    tasks = [asyncio.create_task(client.generate("cancel me", "ctx")) for _ in range(n)]
+    await asyncio.sleep(delay_ms / 4000)
+    for t in tasks[: n // 2]:  # tasks[0] is the leader
+        t.cancel()
+    done = await asyncio.gather(*tasks, return_exceptions=True)
+    cancelled = sum(isinstance(d, asyncio.CancelledError) for d in done)
+    answered = [d for d in done if isinstance(d, str)]
+    check(f"{cancelled} cancelled callers, upstream calls", stub.calls == 1, str(stub.calls))
+    check("remaining callers still answered", len(answered) == n - n // 2, f"{len(answered)}")
+
+
+def thread_check(n, delay_ms):
+    import llm
+    from llm_stub import StubLLMBackend
+
+    stub = StubLLMBackend(delay_ms=delay_ms, error_rate=0)
+    original, llm.backend = llm.backend, stub
+    results = [None] * n
+    barrier = threading.Barrier(n)
+
+    def worker(i):
+        barrier.wait()
+        results[i] = llm.generate_llm_answer("why is my loop slow", "ctx")
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    llm.backend = original
+    check(f"{n} threads via generate_llm_answer -> upstream calls", stub.calls == 1, str(stub.calls))
+    check("every thread got the shared answer", len(set(results)) == 1 and results[0].startswith("[stub"))
+
+
+async def app_check(n):
+    import httpx
+
+    from backend.app import app
+    from llm import llm_client
+
+    before = llm_client.backend.calls
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://check", timeout=None) as client:
+        message = "what is the difference between a process and a thread"
+        responses = await asyncio.gather(*(client.post("/chat", json={"message": message}) for _ in range(n)))
+    replies = {r.json()["reply"] for r in responses}
+    calls = llm_client.backend.calls - before
+    check(f"{n} concurrent POST /chat -> upstream calls", calls == 1, str(calls))
+    check("every response has the same reply", len(replies) == 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=50)
+    parser.add_argument("--delay-ms", type=float, default=300)
+    args = parser.parse_args()
+
+    # must be set before llm.py / chatbot.py are imported
+    os.environ["LLM_BACKEND"] = "stub"
+    os.environ["LLM_STUB_DELAY_MS"] = str(args.delay_ms)
+    os.environ["LLM_STUB_ERROR_RATE"] = "0"
+    os.environ["ANSWER_CACHE_FILE"] = ""
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    print("async client")
+    asyncio.run(async_checks(args.n, args.delay_ms))
+    print("sync generate_llm_answer")
+    thread_check(args.n, args.delay_ms)
+    print("FastAPI /chat")
+    asyncio.run(app_check(args.n))
+    print("all checks passed")
+
+
+if __name__ == "__main__":
+    main()
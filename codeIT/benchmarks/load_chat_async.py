@@ -0,0 +1,84 @@
+"""
+Offline load test for the async /chat path.
+
+Drives the FastAPI app in-process with a mix of rule-answered and LLM-bound
+(off-topic) questions while the LLM is replaced by the slow stub backend, and
+reports latency per path. Rule answers should stay fast even while every LLM
+slot is busy or the circuit breaker is open.
+
+Run from the codeIT directory:
+    python -m benchmarks.load_chat_async --clients 64 --stub-delay-ms 2000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+import numpy as np
+
+RULE_QUERIES = ["hello", "contact number", "who is the ceo", "demo class", "where is codeit"]
+LLM_QUERIES = [
+    "how do i reverse a linked list in c",
+    "explain big o notation with an example",
+    "what is the difference between tcp and udp",
+    "why does my javascript promise never resolve",
+]
+
+
+async def client_loop(client, queries, rounds, latencies):
+    for i in range(rounds):
+        message = queries[i % len(queries)]
+        t0 = time.perf_counter()
+        resp = await client.post("/chat", json={"message": message})
+        resp.raise_for_status()
+        latencies.append(time.perf_counter() - t0)
+
+
+async def run(args):
+    import httpx
+
+    from backend.app import app
+    from llm import llm_client
+
+    rule_lat, llm_lat = [], []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        tasks = []
+        for c in range(args.clients):
+            if c % 2:
+                tasks.append(client_loop(client, LLM_QUERIES, args.rounds, llm_lat))
+            else:
+                tasks.append(client_loop(client, RULE_QUERIES, args.rounds, rule_lat))
+        t0 = time.perf_counter()
+        await asyncio.gather(*tasks)
+        wall = time.perf_counter() - t0
+
+    print(f"{'path':>6} {'requests':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for label, lat in (("rule", rule_lat), ("llm", llm_lat)):
+        ms = np.array(lat) * 1e3
+        print(f"{label:>6} {len(ms):>9} {np.percentile(ms, 50):>9.1f} {np.percentile(ms, 99):>9.1f}")
+    print(f"throughput: {(len(rule_lat) + len(llm_lat)) / wall:.1f} req/s")
+    print("llm client:", llm_client.stats, "breaker:", llm_client.breaker.state)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--stub-delay-ms", type=float, default=2000)
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-timeout-s", type=float, default=5)
+    args = parser.parse_args()
+
+    # must be set before llm.py is imported
+    os.environ["LLM_BACKEND"] = "stub"
+    os.environ["LLM_STUB_DELAY_MS"] = str(args.stub_delay_ms)
+    os.environ["LLM_STUB_ERROR_RATE"] = str(args.stub_error_rate)
+    os.environ["LLM_TIMEOUT_S"] = str(args.llm_timeout_s)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
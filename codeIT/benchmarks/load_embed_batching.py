@@ -0,0 +1,80 @@
+"""
+Load test: query-encode latency and throughput with and without the
+micro-batching EmbeddingBatcher, at 1, 8, 32 and 128 concurrent clients.
+
+Each client thread encodes distinct queries back to back, bypassing the query
+cache, the way concurrent /chat requests reach the encoder on cache misses.
+
+Run from the codeIT directory:
+    python -m benchmarks.load_embed_batching --requests 20 --window-ms 3
+"""
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from embedding_batcher import EmbeddingBatcher, configure_torch_threads
+
+CONCURRENCY = (1, 8, 32, 128)
+
+
+def run_clients(encode, clients, per_client):
+    latencies = []
+    lock = threading.Lock()
+    start_gate = threading.Barrier(clients + 1)
+
+    def client(cid):
+        local = []
+        start_gate.wait()
+        for i in range(per_client):
+            t0 = time.perf_counter()
+            encode(f"client {cid} asks about course number {i} fees and schedule")
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+    for t in threads:
+        t.start()
+    start_gate.wait()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    lat = np.array(latencies) * 1e3
+    return np.percentile(lat, 50), np.percentile(lat, 99), len(lat) / wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20, help="encodes per client")
+    parser.add_argument("--window-ms", type=float, default=3.0)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--torch-threads", type=int, default=0)
+    args = parser.parse_args()
+
+    configure_torch_threads(args.torch_threads)
+    from utils import get_model
+
+    model = get_model()
+    direct = lambda text: model.encode([text], convert_to_numpy=True)
+    batcher = EmbeddingBatcher(
+        lambda texts: model.encode(texts, convert_to_numpy=True, batch_size=args.max_batch),
+        max_batch=args.max_batch,
+        max_wait_ms=args.window_ms,
+    )
+    direct("warm up")
+    batcher.encode("warm up")
+
+    print(f"{'clients':>8} {'mode':>8} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>9}")
+    for clients in CONCURRENCY:
+        for label, encode in (("direct", direct), ("batched", batcher.encode)):
+            p50, p99, rps = run_clients(encode, clients, args.requests)
+            print(f"{clients:>8} {label:>8} {p50:>9.2f} {p99:>9.2f} {rps:>9.1f}")
+    print("batcher:", batcher.stats())
+    batcher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+Offline benchmark / regression suite for the whole answer pipeline.
+
+Generates deterministic query workloads from the dataset and kb_texts.json:
+    rule      exact quick-rule hits (phrases from rules.RULES)
+    course    course titles with one typo (fuzzy course-name match)
+    semantic  paraphrased KB texts (encode + vector search)
+    off_topic coding questions that end up at the LLM
+
+and drives them through chatbot.get_ai_response (sequentially) and through the
+FastAPI app in-process (concurrent clients over httpx.ASGITransport). The LLM
+is a deterministic stub with a fixed delay and the semantic answer cache and
+response cache are disabled (--response-cache enables the latter), so runs
+are comparable. Each workload is run --repeats times (caches emptied before
+each run) and the median of every figure is reported: throughput and
+p50/p95/p99 per workload, the branch that actually answered (see metrics.py)
+and peak RSS.
+
+Run from the codeIT directory:
+    python -m benchmarks.pipeline_suite --output bench.json
+    python -m benchmarks.pipeline_suite --baseline bench.json --threshold 0.25
+
+With --baseline the exit status is 1 if any latency percentile or peak RSS
+grew, or throughput dropped, by more than the threshold and, for latency and
+throughput, by more than --min-delta-ms (for throughput: per request), so
+run-to-run noise on the millisecond paths is not reported. The defaults pass
+when the same tree is measured twice.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+OFF_TOPIC_TOPICS = [
+    "a linked list", "a binary search tree", "recursion", "big o notation", "a hash map",
+    "tcp vs udp", "javascript promises", "python decorators", "sql joins", "git rebase",
+    "docker volumes", "react hooks", "css flexbox", "memory leaks in c", "unit tests",
+]
+OFF_TOPIC_TEMPLATES = [
+    "how do i implement {} step by step",
+    "explain {} with an example",
+    "why would my code using {} be slow",
+    "what are common mistakes with {}",
+]
+PARAPHRASE_TEMPLATES = ["could you tell me {}", "{} please", "i wanted to ask, {}", "{}?"]
+
+
+def build_workloads(n, seed=0, data_file="codeit_dataset.json", kb_file="kb_texts.json"):
+    from rules import RULES
+    from utils import load_json
+
+    rng = random.Random(seed)
+    dataset = load_json(data_file)
+    kb_texts = load_json(kb_file)
+
+    rule_queries = []
+    for rule in RULES:
+        exclude = rule.get("exclude", [])
+        for p in rule.get("prefixes", []):
+            rule_queries.append(f"{p} there")
+        for p in rule.get("phrases", []):
+            q = f"tell me about {p}"
+            if not any(x in q for x in exclude):
+                rule_queries.append(q)
+
+    titles = [c["title"] for courses in dataset.get("courses", {}).values() for c in courses if c.get("title")]
+    course_queries = []
+    for title in titles:
+        t = title.lower()
+        i = rng.randrange(1, len(t))
+        course_queries.append(t[:i - 1] + t[i:])  # drop one character
+
+    semantic_queries = [rng.choice(PARAPHRASE_TEMPLATES).format(t.lower().rstrip("?")) for t in kb_texts]
+    off_topic = [t.format(topic) for t in OFF_TOPIC_TEMPLATES for topic in OFF_TOPIC_TOPICS]
+
+    def sample(pool):
+        return [pool[i % len(pool)] for i in range(n)] if len(pool) < n else rng.sample(pool, n)
+
+    return {
+        "rule": sample(rule_queries),
+        "course": sample(course_queries),
+        "semantic": sample(semantic_queries),
+        "off_topic": sample(off_topic),
+    }
+
+
+def summarize(latencies, wall):
+    ms = np.array(latencies) * 1e3
+    return {
+        "requests": len(ms),
+        "throughput_rps": round(len(ms) / wall, 2) if wall else 0.0,
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+    }
+
+
+def median_summary(runs):
+    """Median of each figure over repeated runs of one workload."""
+    out = dict(runs[0])
+    for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+        out[key] = round(float(np.median([r[key] for r in runs])), 3)
+    return out
+
+
+def reset_caches():
+    """Empties the caches a run fills, so every repeat measures the same work."""
+    import chatbot
+    from utils import query_cache
+
+    query_cache.clear()
+    if chatbot.response_cache is not None:
+        chatbot.response_cache.clear()
+
+
+def run_direct(workloads, repeats=1):
+    import metrics
+    from chatbot import get_ai_response
+
+    results = {}
+    for name, queries in workloads.items():
+        runs = []
+        for _ in range(repeats):
+            reset_caches()
+            latencies, branches = [], Counter()
+            t0 = time.perf_counter()
+            for q in queries:
+                start = time.perf_counter()
+                with metrics.request(q) as trace:
+                    get_ai_response(q)
+                latencies.append(time.perf_counter() - start)
+                branches[trace.answered_by] += 1
+            runs.append(summarize(latencies, time.perf_counter() - t0))
+            runs[-1]["answered_by"] = dict(branches)
+        results[name] = median_summary(runs)
+    return results
+
+
+async def run_app(workloads, clients, repeats=1):
+    import httpx
+
+    from backend.app import app
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for name, queries in workloads.items():
+            runs = []
+            for _ in range(repeats):
+                reset_caches()
+                latencies = []
+                it = iter(queries)
+
+                async def worker():
+                    for q in it:
+                        start = time.perf_counter()
+                        resp = await client.post("/chat", json={"message": q})
+                        resp.raise_for_status()
+                        latencies.append(time.perf_counter() - start)
+
+                t0 = time.perf_counter()
+                await asyncio.gather(*(worker() for _ in range(clients)))
+                runs.append(summarize(latencies, time.perf_counter() - t0))
+            results[name] = median_summary(runs)
+    return results
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KiB on Linux
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def compare(current, baseline, threshold, min_delta_ms):
+    """Returns a list of human-readable regressions of current vs baseline."""
+    regressions = []
+    for mode in ("direct", "app"):
+        for name, base in baseline.get(mode, {}).items():
+            cur = current.get(mode, {}).get(name)
+            if cur is None:
+                continue
+            for key in ("p50_ms", "p95_ms", "p99_ms"):
+                if cur[key] > base[key] * (1 + threshold) and cur[key] - base[key] > min_delta_ms:
+                    regressions.append(f"{mode}/{name} {key}: {base[key]:.2f} -> {cur[key]:.2f}")
+            # the absolute guard for throughput is on the time per request
+            per_request_ms = (1000.0 / cur["throughput_rps"] - 1000.0 / base["throughput_rps"]
+                              if cur["throughput_rps"] and base["throughput_rps"] else 0.0)
+            if cur["throughput_rps"] < base["throughput_rps"] * (1 - threshold) and per_request_ms > min_delta_ms:
+                regressions.append(
+                    f"{mode}/{name} throughput_rps: {base['throughput_rps']:.1f} -> {cur['throughput_rps']:.1f}"
+                )
+    cur_rss, base_rss = current.get("peak_rss_mb"), baseline.get("peak_rss_mb")
+    if cur_rss and base_rss and cur_rss > base_rss * (1 + threshold):
+        regressions.append(f"peak_rss_mb: {base_rss:.1f} -> {cur_rss:.1f}")
+    return regressions
+
+
+def print_table(title, results):
+    print(f"\n{title}")
+    print(f"{'workload':<10} {'req':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  answered by")
+    for name, r in results.items():
+        branches = ", ".join(f"{k}={v}" for k, v in sorted(r.get("answered_by", {}).items()))
+        print(
+            f"{name:<10} {r['requests']:>5} {r['throughput_rps']:>9.1f} {r['p50_ms']:>9.2f} "
+            f"{r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f}  {branches}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="queries per workload")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent clients for the app run")
+    parser.add_argument("--llm-delay-ms", type=float, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-app", action="store_true")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative regression")
+    parser.add_argument("--repeats", type=int, default=5, help="runs per workload; medians are reported")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0,
+                        help="smallest latency (or per-request time) change reported as a regression")
+    parser.add_argument("--response-cache", action="store_true", help="keep the exact response cache on")
+    args = parser.parse_args()
+
+    # must be set before llm.py / chatbot.py are imported
+    os.environ["LLM_BACKEND"] = "stub"
+    os.environ["LLM_STUB_DELAY_MS"] = str(args.llm_delay_ms)
+    os.environ["LLM_STUB_ERROR_RATE"] = "0"
+    os.environ["ANSWER_CACHE_FILE"] = ""
+    if not args.response_cache:
+        os.environ["RESPONSE_CACHE_SIZE"] = "0"
+    os.environ["METRICS_ENABLED"] = "true"
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    import chatbot
+
+    # deterministic stand-in for the synchronous Gemini call
+    def stub_llm_answer(query, context="", history=None):
+        time.sleep(args.llm_delay_ms / 1000.0)
+        return f"[stub answer] {query}"
+
+    chatbot.generate_llm_answer = stub_llm_answer
+    chatbot.warm_up()
+
+    workloads = build_workloads(args.requests, seed=args.seed)
+    results = {
+        "meta": {
+            "requests_per_workload": args.requests,
+            "clients": args.clients,
+            "llm_delay_ms": args.llm_delay_ms,
+            "seed": args.seed,
+            "repeats": args.repeats,
+            "response_cache": args.response_cache,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "direct": run_direct(workloads, args.repeats),
+    }
+    print_table("get_ai_response (sequential)", results["direct"])
+    if not args.skip_app:
+        results["app"] = asyncio.run(run_app(workloads, args.clients, args.repeats))
+        print_table(f"POST /chat ({args.clients} clients)", results["app"])
+    results["peak_rss_mb"] = peak_rss_mb()
+    print(f"\npeak RSS: {results['peak_rss_mb']} MB")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"saved {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\nREGRESSIONS (> {args.threshold:.0%} vs {args.baseline}):")
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+        print(f"\nno regressions vs {args.baseline} (threshold {args.threshold:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Startup profiler: time to import each layer of the service, load the KB
+artifact, import and load the encoder, and run the warm-up, as one cold
+process sees it.
+
+Run from the codeIT directory (in a fresh process, so nothing is cached):
+    python -m benchmarks.profile_startup
+"""
+import importlib
+import sys
+import time
+
+import startup_profile
+from startup_profile import stage
+
+MODULES = ["numpy", "fastapi", "utils", "llm", "chatbot", "backend.app"]
+
+
+def main():
+    t0 = time.perf_counter()
+    for name in MODULES:
+        with stage(f"import {name}"):
+            importlib.import_module(name)
+    chatbot = sys.modules["chatbot"]
+    chatbot.warm_up()
+    heavy = [m for m in ("torch", "sentence_transformers", "google.generativeai") if m in sys.modules]
+
+    print(startup_profile.report())
+    print(f"wall clock to warm: {(time.perf_counter() - t0) * 1000:.1f} ms")
+    print("heavy modules loaded:", ", ".join(heavy) or "none")
+
+
+if __name__ == "__main__":
+    main()
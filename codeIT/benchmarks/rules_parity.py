@@ -0,0 +1,143 @@
+"""
+Parity check: the compiled rule table in rules.py must answer exactly like the
+original if/elif chain in chatbot.chatbot().
+
+Run from the codeIT directory:
+    python -m benchmarks.rules_parity
+"""
+import itertools
+import json
+import random
+import sys
+
+from rules import match_rule, rule_answer
+
+CORPUS = [
+    "hi", "hello there", "hey!", "history of codeit", "his course", "heyo",
+    "what is codeit ai", "tell me about codeit ai", "who are you", "who r u bro",
+    "thank you", "thanks a lot", "how are you", "how are you doing codeit ai",
+    "contact number please", "contact info", "how do i contact you", "institute contact",
+    "contact details", "phone number", "contact us", "how to contact", "contact",
+    "where are you located", "where is your institute", "your location",
+    "institute location", "center location", "where is codeit", "located at dharan?",
+    "who is the ceo", "ceo", "owner of codeit", "founder", "who is founder of mentors",
+    "mentors", "list of mentors", "who is the mentor for python", "mentor for ui",
+    "demo class", "is demo available", "do i get certificate", "certification",
+    "beginner courses", "is it for beginner", "payment methods", "how to make payment",
+    "projects", "project in mern stack", "what projects will i do", "list projects",
+    "project price", "price of project", "projects in flutter development",
+    "e-commerce platform project", "python course", "mern stack", "fees of python course",
+    "what is the price of django", "hey what is the price", "thanks for the demo",
+    "where is codeit ai located", "who r u and where are you located",
+    "i want a certificate and a demo", "payment for project", "", "ok", "xyz",
+]
+
+LEGACY_PHRASES = [
+    "hi", "hello", "hey", "codeit ai", "who are you", "thank", "how are you", "contact",
+    "located", "ceo", "owner", "founder", "mentor", "who is", "demo", "certificate",
+    "certification", "beginner", "payment", "project", "price", "what projects",
+]
+
+
+def legacy_rules(q, dataset, memory):
+    """Verbatim copy of the pre-table rule chain, returning None on fall-through."""
+    company = dataset.get("company", {})
+    projects_list = dataset.get("projects", [])
+
+    if q.startswith(("hi", "hello", "hey")):
+        return "Hey there! 😊 How can I help you today?"
+    if "what is codeit ai" in q or "codeit ai" in q:
+        return "CodeIt AI is a smart learning assistant created to help students explore courses, mentors, and everything about CodeIt Institute in a simple way! 🤖✨"
+    if "who are you" in q or "who r u" in q:
+        return "I'm CodeIt AI 🤖 — your friendly learning assistant here to help you explore courses, mentors, and all things CodeIt Institute!"
+    if "thank" in q or "thanks" in q:
+        return "You're very welcome! 💫"
+    if "how are you" in q:
+        return "I'm great and ready to help you learn! What about you?"
+    if any(phrase in q for phrase in [
+        "contact number", "contact info", "how do i contact", "institute contact",
+        "contact details", "phone number", "contact us", "how to contact"
+    ]):
+        contact = company.get("contact", {})
+        return f"Email: {contact.get('email','')} | Phones: {', '.join(contact.get('phones',[]))} | Working hours: {contact.get('working_hours','')}"
+    if any(phrase in q for phrase in [
+        "where are you located", "where is your institute", "your location",
+        "institute location", "center location", "where is codeit", "located at"
+    ]):
+        return f"Our company is located at {company.get('location', '')}."
+    if any(word in q for word in ["ceo", "owner", "founder"]):
+        mentors = company.get("mentors", [])
+        for m in mentors:
+            role = (m.get("role") or "").lower()
+            if any(r in role for r in ["ceo", "founder", "owner"]):
+                memory["last_person"] = m
+                return f"{m.get('name')} is the {m.get('role')} of {company.get('name')} with {m.get('experience','')} experience."
+        return "Sorry, I couldn't find information about the owner."
+    if "mentor" in q and not ("who is" in q):
+        mentors = company.get("mentors", [])
+        if mentors:
+            return "Some mentors:\n" + "\n".join([f"{m.get('name')} - {m.get('role')} ({m.get('experience','')})" for m in mentors])
+        else:
+            return "No mentor info available."
+    if "demo" in q:
+        return "Yes, demo classes are available."
+    if "certificate" in q or "certification" in q:
+        return "Yes! You will receive an official completion certificate after finishing the course. 🎓"
+    if "beginner" in q:
+        return "Yes, we have beginner-friendly courses."
+    if "payment" in q:
+        return "We accept eSewa, Khalti, bank deposits, and in-person payments."
+    if "project" in q and not "price" in q:
+        found_projects = []
+        for p in projects_list:
+            if p.get("title", "").lower() in q or p.get("course", "").lower() in q:
+                found_projects.append(f"- {p.get('title')} ({p.get('course')})")
+        if found_projects:
+            return "Here are some relevant projects:\n" + "\n".join(found_projects[:3])
+        if "what projects" in q or "list projects" in q:
+            return "We have many projects like: " + ", ".join([p["title"] for p in projects_list[:4]]) + "..."
+        return "Yes — students work on real projects during the course. Ask me about projects in a specific course!"
+    return None
+
+
+def compiled_rules(q, dataset, memory):
+    rule = match_rule(q)
+    return rule_answer(rule, q, dataset, memory) if rule else None
+
+
+def build_corpus(dataset, kb_texts, n_random=2000, seed=7):
+    queries = list(CORPUS) + list(kb_texts)
+    for category, course_list in dataset.get("courses", {}).items():
+        for c in course_list:
+            queries.append(f"project in {c.get('title', '')}")
+            queries.append(f"price of {c.get('title', '')} project")
+    rng = random.Random(seed)
+    words = sorted({w for q in queries for w in q.split()}) + LEGACY_PHRASES
+    for _ in range(n_random):
+        queries.append(" ".join(rng.choice(words) for _ in range(rng.randint(1, 6))))
+    for a, b in itertools.combinations(LEGACY_PHRASES, 2):
+        queries.append(f"{a} {b}")
+    return [q.lower().strip() for q in queries]
+
+
+def main():
+    with open("codeit_dataset.json", "r", encoding="utf-8") as f:
+        dataset = json.load(f)
+    with open("kb_texts.json", "r", encoding="utf-8") as f:
+        kb_texts = json.load(f)
+    queries = build_corpus(dataset, kb_texts)
+    mismatches = []
+    for q in queries:
+        old = legacy_rules(q, dataset, {})
+        new = compiled_rules(q, dataset, {})
+        if old != new:
+            mismatches.append((q, old, new))
+
+    print(f"checked {len(queries)} queries, {len(mismatches)} mismatches")
+    for q, old, new in mismatches[:20]:
+        print(f"  {q!r}\n    legacy:   {old!r}\n    compiled: {new!r}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
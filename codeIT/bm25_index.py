@@ -0,0 +1,116 @@
+"""
+BM25 inverted index over the KB texts, plus reciprocal-rank fusion.
+
+Most KB texts are short keyword strings (course titles, "price of X",
+"who is Y", FAQ keys), where a lexical match is both accurate and far cheaper
+than running the encoder. chatbot.py queries this index first and only
+encodes the question when the lexical hit is not confident.
+"""
+import re
+from collections import defaultdict
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+
+# question words and fillers that carry no meaning for KB lookup
+STOPWORDS = frozenset("""
+a about an and any are can could do does for from give have how i in is it
+me much my of on or please show tell that the there this to what when where
+which will with would you your
+""".split())
+
+SYNONYMS = {"fee": "price", "cost": "price", "charge": "price", "pay": "payment"}
+
+
+def _normalize_token(tok):
+    # crude plural folding, applied alike to KB texts and queries
+    if len(tok) > 3 and tok.endswith("s") and not tok.endswith("ss"):
+        tok = tok[:-1]
+    return SYNONYMS.get(tok, tok)
+
+
+def tokenize(text):
+    return [_normalize_token(t) for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    def __init__(self, texts, k1=1.2, b=0.75):
+        self.texts = list(texts)
+        self.k1 = k1
+        self.b = b
+        docs = [tokenize(t) for t in self.texts]
+        self.doc_tokens = [set(d) for d in docs]
+        lengths = np.array([len(d) for d in docs], dtype=np.float32)
+        avg = float(lengths.mean()) if len(docs) and lengths.sum() else 1.0
+
+        tf = defaultdict(lambda: defaultdict(int))
+        for doc_id, tokens in enumerate(docs):
+            for tok in tokens:
+                tf[tok][doc_id] += 1
+
+        # per token: (doc ids, precomputed BM25 term weights)
+        n = len(docs)
+        self.postings = {}
+        for tok, counts in tf.items():
+            ids = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+            freqs = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+            idf = np.log(1.0 + (n - len(ids) + 0.5) / (len(ids) + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * lengths[ids] / avg)
+            self.postings[tok] = (ids, idf * freqs * (self.k1 + 1.0) / (freqs + norm))
+
+    def __len__(self):
+        return len(self.texts)
+
+    def scores(self, query_tokens):
+        out = np.zeros(len(self.texts), dtype=np.float32)
+        for tok in set(query_tokens):
+            posting = self.postings.get(tok)
+            if posting is not None:
+                out[posting[0]] += posting[1]
+        return out
+
+    def search(self, query, top_k=10):
+        """
+        Returns (results, query_tokens); results is a list of
+        (kb_text, score, index) with score > 0, sorted by score desc.
+        """
+        tokens = tokenize(query)
+        if not tokens or not self.texts:
+            return [], tokens
+        scores = self.scores(tokens)
+        k = min(top_k, int(np.count_nonzero(scores)))
+        if k == 0:
+            return [], tokens
+        idxs = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        idxs = idxs[np.argsort(-scores[idxs], kind="stable")][:k]
+        return [(self.texts[i], float(scores[i]), int(i)) for i in idxs], tokens
+
+    def coverage(self, query_tokens, idx):
+        """Fraction of the query's distinct tokens that occur in KB text idx."""
+        tokens = set(query_tokens)
+        if not tokens:
+            return 0.0
+        return len(tokens & self.doc_tokens[idx]) / len(tokens)
+
+    def same_entry(self, i, j):
+        """
+        True if one KB text contains every term of the other and more, as with
+        "X", "what is X" and "price of X", which all describe the same entry.
+        Texts with identical terms are a tie, not the same entry.
+        """
+        a, b = self.doc_tokens[i], self.doc_tokens[j]
+        return a > b or b > a
+
+
+def rrf_fuse(rankings, k=60, top_k=None):
+    """
+    Reciprocal-rank fusion of several ranked lists of ids.
+    Returns [(id, fused_score)] sorted by fused score desc.
+    """
+    fused = defaultdict(float)
+    for ranking in rankings:
+        for rank, key in enumerate(ranking):
+            fused[key] += 1.0 / (k + rank + 1)
+    ordered = sorted(fused.items(), key=lambda item: -item[1])
+    return ordered[:top_k] if top_k else ordered
@@ -1,142 +1,301 @@
-import json
-from difflib import get_close_matches
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+from metrics import answered_by, timed, request as trace_request
+from startup_profile import stage
+from utils import encode_queries, encode_query, file_sha256
+from kb_artifact import ARTIFACT_FILE, DATA_FILE, load_kb
+from bm25_index import BM25Index, rrf_fuse
+from course_index import CourseIndex
+from vector_index import VectorIndex, normalize_rows
+from answer_cache import SemanticAnswerCache
+from response_cache import ResponseCache
+from llm import generate_llm_answer, llm_client
+from rules import match_rule, rule_answer
 
-from utils import load_json, create_or_load_embeddings, semantic_search
-from kbuilder import build_kb_texts_from_dataset
-from llm import generate_llm_answer
-
-DATA_FILE = "codeit_dataset.json"
 SIMILARITY_THRESHOLD = 0.56
 TOP_K = 3
+COURSE_MATCH_CUTOFF = 0.5
+
+# "exact" (default) or "ivf" approximate search for large KBs
+VECTOR_INDEX_MODE = os.getenv("VECTOR_INDEX_MODE", "exact")
+IVF_N_LISTS = int(os.getenv("IVF_N_LISTS", "0")) or None
+IVF_N_PROBE = int(os.getenv("IVF_N_PROBE", "4"))
+
+# "hybrid" (default): BM25 first, answering directly on a confident lexical hit
+# and otherwise fusing BM25 and embedding ranks (RRF); "dense": embeddings only
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+LEXICAL_MIN_SCORE = float(os.getenv("LEXICAL_MIN_SCORE", "4.0"))
+LEXICAL_MARGIN = float(os.getenv("LEXICAL_MARGIN", "0.25"))
+LEXICAL_MIN_COVERAGE = float(os.getenv("LEXICAL_MIN_COVERAGE", "1.0"))
+HYBRID_CANDIDATES = 10
+RRF_K = 60
+
+# LLM calls in flight per /chat/batch request
+CHAT_BATCH_LLM_CONCURRENCY = int(os.getenv("CHAT_BATCH_LLM_CONCURRENCY", "4"))
+
+# exact cache of rule / course / lexical / semantic replies (0 disables)
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "4096"))
+
+# semantic cache of LLM answers (empty file disables; TTL in seconds, 0 = none)
+ANSWER_CACHE_FILE = os.getenv("ANSWER_CACHE_FILE", "answer_cache.sqlite3")
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1000"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "86400"))
+ANSWER_CACHE_MAX_DISTANCE = float(os.getenv("ANSWER_CACHE_MAX_DISTANCE", "0.08"))
 
-# load dataset
-dataset = load_json(DATA_FILE)
+logger = logging.getLogger("codeit-chatbot.kb")
 
-# build KB and embeddings (done once on import)
-kb_texts, kb_answers = build_kb_texts_from_dataset(dataset)
-kb_embeddings = create_or_load_embeddings(kb_texts)
+
+class KBSnapshot:
+    """
+    Everything built from one version of the dataset: the opened artifact,
+    the vector, BM25 and course indexes and the LLM context block of each KB
+    row (its text and answer). Never modified after construction;
+    a reload builds a new snapshot and swaps it in (see reload_kb), so a
+    request that took the old one finishes on it.
+    """
+
+    def __init__(self, data_file=DATA_FILE, artifact_file=ARTIFACT_FILE):
+        started = time.perf_counter()
+        store = load_kb(data_file, artifact_file)
+        self.store = store
+        self.dataset = store.extra["dataset"]
+        self.version = store.extra["dataset_version"]
+        self.texts = store.extra["texts"]
+        self.answers = store.extra["answers"]  # unique answers
+        self.answer_ids = np.asarray(store.extra["answer_ids"], dtype=np.int64)  # row -> answer
+        self.context_blocks = [
+            f"Q: {text}\nA: {self.answers[a]}" for text, a in zip(self.texts, store.extra["answer_ids"])
+        ]
+        with stage("build indexes"):
+            self.kb_index = VectorIndex(store, self.texts, mode=VECTOR_INDEX_MODE,
+                                        n_lists=IVF_N_LISTS, n_probe=IVF_N_PROBE, groups=self.answer_ids)
+            self.bm25_index = BM25Index(self.texts)
+            # fuzzy course-title index
+            self.course_index = CourseIndex(self.dataset.get("courses", {}), cutoff=COURSE_MATCH_CUTOFF)
+        self.built_at = time.time()
+        self.build_seconds = time.perf_counter() - started
+
+    def info(self):
+        return {
+            "version": self.version,
+            "built_at": datetime.fromtimestamp(self.built_at, timezone.utc).isoformat(),
+            "build_seconds": round(self.build_seconds, 3),
+            "texts": len(self.texts),
+            "answers": len(self.answers),
+        }
+
+
+# load the precompiled KB artifact (see kb_artifact.py; rebuilt if stale)
+_snapshot = KBSnapshot(DATA_FILE, ARTIFACT_FILE)
+_reload_lock = threading.Lock()
+
+
+def current_snapshot() -> KBSnapshot:
+    """The KB snapshot new requests should use."""
+    return _snapshot
+
+
+answer_cache = None
+if ANSWER_CACHE_FILE:
+    answer_cache = SemanticAnswerCache(
+        ANSWER_CACHE_FILE,
+        max_entries=ANSWER_CACHE_SIZE,
+        ttl=ANSWER_CACHE_TTL,
+        max_distance=ANSWER_CACHE_MAX_DISTANCE,
+        dataset_version=_snapshot.version,
+    )
+
+response_cache = None
+if RESPONSE_CACHE_SIZE:
+    response_cache = ResponseCache(max_size=RESPONSE_CACHE_SIZE, dataset_version=_snapshot.version)
 
 # small memory store
 memory = {"last_person": None, "last_topic": None}
 
-def find_course_name(user_text, courses_list):
-    titles = [c["title"].lower() for c in courses_list]
-    match = get_close_matches(user_text, titles, n=1, cutoff=0.5)
-    return match[0] if match else None
+def answered(branch, answer):
+    answered_by(branch)
+    return answer, branch
 
 
-def chatbot(question: str, history=None) -> str:
+def quick_answer(question: str, kb: KBSnapshot):
     """
-    Main chatbot function. Backend should call get_ai_response(query, history).
+    Answers that need no embedding: empty input, quick rules and course names.
+    Returns (answer, branch), or (None, None) when the question needs retrieval.
     """
     if not question:
-        return "Can you please rephrase that? 😊"
+        return answered("empty", "Can you please rephrase that? 😊")
 
     q = question.lower().strip()
     if len(q) < 2:
-        return "Can you please rephrase that? 😊"
-
-    company = dataset.get("company", {})
-    courses_info = dataset.get("courses", {})
-    cs = dataset.get("course_structure", {})
-    projects_list = dataset.get("projects", [])
-
-    # --- quick exact rules ---
-    if q.startswith(("hi", "hello", "hey")):
-        return "Hey there! 😊 How can I help you today?"
-
-    if "what is codeit ai" in q or "codeit ai" in q:
-        return "CodeIt AI is a smart learning assistant created to help students explore courses, mentors, and everything about CodeIt Institute in a simple way! 🤖✨"
-
-    if "who are you" in q or "who r u" in q:
-        return "I'm CodeIt AI 🤖 — your friendly learning assistant here to help you explore courses, mentors, and all things CodeIt Institute!"
-
-    if "thank" in q or "thanks" in q:
-        return "You're very welcome! 💫"
-
-    if "how are you" in q:
-        return "I'm great and ready to help you learn! What about you?"
-
-    # contact
-    if any(phrase in q for phrase in [
-        "contact number", "contact info", "how do i contact", "institute contact",
-        "contact details", "phone number", "contact us", "how to contact"
-    ]):
-        contact = company.get("contact", {})
-        return f"Email: {contact.get('email','')} | Phones: {', '.join(contact.get('phones',[]))} | Working hours: {contact.get('working_hours','')}"
-
-    # location
-    if any(phrase in q for phrase in [
-        "where are you located", "where is your institute", "your location",
-        "institute location", "center location", "where is codeit", "located at"
-    ]):
-        return f"Our company is located at {company.get('location', '')}."
-
-    # CEO/Owner/Founder
-    if any(word in q for word in ["ceo", "owner", "founder"]):
-        mentors = company.get("mentors", [])
-        for m in mentors:
-            role = (m.get("role") or "").lower()
-            if any(r in role for r in ["ceo", "founder", "owner"]):
-                memory["last_person"] = m
-                return f"{m.get('name')} is the {m.get('role')} of {company.get('name')} with {m.get('experience','')} experience."
-        return "Sorry, I couldn't find information about the owner."
-
-    # mentors
-    if "mentor" in q and not ("who is" in q):
-        mentors = company.get("mentors", [])
-        if mentors:
-            return "Some mentors:\n" + "\n".join([f"{m.get('name')} - {m.get('role')} ({m.get('experience','')})" for m in mentors])
-        else:
-            return "No mentor info available."
-
-    # short FAQ
-    if "demo" in q:
-        return "Yes, demo classes are available."
-    if "certificate" in q or "certification" in q:
-        return "Yes! You will receive an official completion certificate after finishing the course. 🎓"
-    if "beginner" in q:
-        return "Yes, we have beginner-friendly courses."
-    if "payment" in q:
-        return "We accept eSewa, Khalti, bank deposits, and in-person payments."
-
-    # projects - Specific Intent Check
-    if "project" in q and not "price" in q:
-        # Try to find specific project mentions
-        found_projects = []
-        for p in projects_list:
-            if p.get("title", "").lower() in q or p.get("course", "").lower() in q:
-                found_projects.append(f"- {p.get('title')} ({p.get('course')})")
-        
-        if found_projects:
-             return "Here are some relevant projects:\n" + "\n".join(found_projects[:3])
-        
-        if "what projects" in q or "list projects" in q:
-             return "We have many projects like: " + ", ".join([p["title"] for p in projects_list[:4]]) + "..."
-
-        return "Yes — students work on real projects during the course. Ask me about projects in a specific course!"
+        return answered("empty", "Can you please rephrase that? 😊")
+
+    # --- quick exact rules (single pass, see rules.RULES for priority) ---
+    with timed("rules"):
+        rule = match_rule(q)
+        if rule:
+            return answered("rule", rule_answer(rule, q, kb.dataset, memory))
 
     # --- Course name rule ---
-    for category, course_list in courses_info.items():
-        cname = find_course_name(q, course_list)
-        if cname:
-            for c in course_list:
-                if (c.get("title") or "").lower() == cname:
-                    memory["last_topic"] = c.get("title")
-                    return f"{c.get('title')} — Price: {c.get('price','N/A')}. {c.get('url','') or ''}"
+    with timed("course_match"):
+        c = kb.course_index.find(q)
+    if c:
+        memory["last_topic"] = c.get("title")
+        return answered("course", f"{c.get('title')} — Price: {c.get('price','N/A')}. {c.get('url','') or ''}")
 
-    # --- Semantic fallback ---
-    sem = semantic_search(question, kb_embeddings, kb_texts, top_k=TOP_K)
+    return None, None
+
+
+def semantic_answer(q_emb, sem, kb: KBSnapshot):
+    """
+    Turns search results into (answer, "semantic") above SIMILARITY_THRESHOLD,
+    otherwise (None, retrieval) for the LLM, or (None, None) if sem is empty.
+    """
     if sem:
         top_text, top_score, top_idx = sem[0]
         if top_score >= SIMILARITY_THRESHOLD:
-            return kb_answers[top_idx]
+            return answered("semantic", kb.answers[kb.answer_ids[top_idx]])
+
+        # --- LLM fallback context ---
+        return None, {
+            "context": tuple(kb.context_blocks[r[2]] for r in sem),
+            "query_embedding": q_emb,
+            "kb_ids": [r[2] for r in sem],
+        }
+
+    return None, None
 
-        # --- LLM fallback using Groq ---
-        context = "\n".join([r[0] for r in sem])
-        llm_answer = generate_llm_answer(question, context, history)
-        if llm_answer:
-            return llm_answer
+
+def lexical_answer(question: str, kb: KBSnapshot):
+    """
+    BM25 stage of hybrid retrieval. Returns (answer, lexical_results); answer
+    is set only for a confident hit: it contains every query term, scores at
+    least LEXICAL_MIN_SCORE and beats the best competing hit by LEXICAL_MARGIN
+    (relative). Texts about the same entry ("X", "price of X") do not compete;
+    BM25 already ranks the best-fitting one first. Texts with the same terms
+    but a different answer do, so such a tie is deferred.
+    """
+    with timed("lexical"):
+        lex, tokens = kb.bm25_index.search(question, top_k=HYBRID_CANDIDATES)
+        if not lex:
+            return None, lex
+        top_text, top_score, top_idx = lex[0]
+        if top_score < LEXICAL_MIN_SCORE or kb.bm25_index.coverage(tokens, top_idx) < LEXICAL_MIN_COVERAGE:
+            return None, lex
+        runner_up = next(
+            (s for _, s, i in lex[1:]
+             if kb.answer_ids[i] != kb.answer_ids[top_idx] and not kb.bm25_index.same_entry(i, top_idx)),
+            0.0,
+        )
+        if top_score < runner_up * (1.0 + LEXICAL_MARGIN):
+            return None, lex
+    answered_by("lexical")
+    return kb.answers[kb.answer_ids[top_idx]], lex
+
+
+def fuse_results(q_emb, sem, lex, kb: KBSnapshot):
+    """
+    Reciprocal-rank fusion of the embedding and BM25 rankings (by answer).
+    Returns the TOP_K fused hits as (kb_text, cosine score, index), so the usual
+    SIMILARITY_THRESHOLD still decides whether to answer directly.
+    """
+    if not lex:
+        return sem[:TOP_K]
+    # rank answers, not rows: each answer at its best row in either list
+    sem_rows, lex_rows = {}, {}
+    for results, rows in ((sem, sem_rows), (lex, lex_rows)):
+        for _, _, i in results:
+            rows.setdefault(int(kb.answer_ids[i]), i)
+    fused = [
+        sem_rows.get(aid, lex_rows.get(aid))
+        for aid, _ in rrf_fuse([list(sem_rows), list(lex_rows)], k=RRF_K, top_k=TOP_K)
+    ]
+    cosine = {i: s for _, s, i in sem}
+    missing = [i for i in fused if i not in cosine]
+    if missing:
+        q = normalize_rows(q_emb)[0]
+        cosine.update(zip(missing, kb.kb_index.scores(q, np.array(missing)).tolist()))
+    return [(kb.texts[i], float(cosine[i]), i) for i in fused]
+
+
+def prepare_answer(question: str, kb: KBSnapshot = None):
+    """
+    Runs every step that does not need the LLM.
+    Returns (answer, branch) when answered, (None, retrieval) when the LLM
+    should be asked, or (None, None) to go straight to the static fallbacks.
+    branch is the deterministic branch that answered ("rule", "semantic", ...).
+    retrieval holds the LLM "context" (the retrieved rows' context blocks, best
+    first), the "query_embedding" and the retrieved "kb_ids". kb defaults to the current snapshot.
+    """
+    kb = kb or current_snapshot()
+    answer, branch = quick_answer(question, kb)
+    if answer is not None:
+        return answer, branch
+
+    hybrid = RETRIEVAL_MODE == "hybrid"
+    lex = None
+    if hybrid:
+        answer, lex = lexical_answer(question, kb)
+        if answer is not None:
+            return answer, "lexical"
+
+    # --- Semantic fallback ---
+    with timed("encode"):
+        q_emb = encode_query(question)
+    with timed("search"):
+        sem = kb.kb_index.search(q_emb, top_k=HYBRID_CANDIDATES if hybrid else TOP_K)
+        if hybrid:
+            sem = fuse_results(q_emb, sem, lex, kb)
+    return semantic_answer(q_emb, sem, kb)
+
+
+def prepare_answers(questions, kb: KBSnapshot = None):
+    """
+    prepare_answer() for many questions: quick and lexical answers first,
+    then every remaining question is encoded in one model call and scored
+    against the KB with one matrix multiply. Results are in input order.
+    """
+    kb = kb or current_snapshot()
+    hybrid = RETRIEVAL_MODE == "hybrid"
+    prepared = [None] * len(questions)
+    lexical = {}
+    pending = []
+    for i, question in enumerate(questions):
+        answer, branch = quick_answer(question, kb)
+        if answer is None and hybrid:
+            answer, lexical[i] = lexical_answer(question, kb)
+            branch = "lexical"
+        if answer is not None:
+            prepared[i] = (answer, branch)
+        else:
+            pending.append(i)
+
+    if pending:
+        q_embs = encode_queries([questions[i] for i in pending])
+        results = kb.kb_index.search_batch(q_embs, top_k=HYBRID_CANDIDATES if hybrid else TOP_K)
+        for i, q_emb, sem in zip(pending, q_embs, results):
+            q_emb = q_emb[None, :]
+            if hybrid:
+                sem = fuse_results(q_emb, sem, lexical[i], kb)
+            prepared[i] = semantic_answer(q_emb, sem, kb)
+    return prepared
+
+
+def fallback_answer(question: str, kb: KBSnapshot) -> str:
+    """
+    Static answers used when the LLM is skipped, fails or is unavailable.
+    """
+    q = question.lower().strip()
+    courses_info = kb.dataset.get("courses", {})
+    cs = kb.dataset.get("course_structure", {})
 
     # --- Courses fallback ---
     if "course" in q or "training" in q or "offer" in q:
@@ -169,5 +328,292 @@ def chatbot(question: str, history=None) -> str:
     return "I'm still learning — I don't have an answer for that yet. 😊"
 
 
+def cached_response(question: str, kb: KBSnapshot):
+    """(reply, branch) from the response cache, or (None, None)."""
+    if response_cache is None:
+        return None, None
+    with timed("response_cache"):
+        entry = response_cache.get(question, kb.version)
+    if entry is None:
+        return None, None
+    return answered(entry[1], entry[0])
+
+
+def remember_response(question: str, kb: KBSnapshot, answer, branch):
+    """
+    Records a response-cache miss: a reply from a deterministic branch is
+    stored, anything else (answer None: LLM or fallback) only counted.
+    """
+    if response_cache is None:
+        return
+    if answer is None:
+        response_cache.skip()
+    else:
+        response_cache.put(question, kb.version, answer, branch)
+
+
+def prepare_cached(question: str, kb: KBSnapshot):
+    """prepare_answer() behind the response cache."""
+    answer, detail = cached_response(question, kb)
+    if answer is None:
+        answer, detail = prepare_answer(question, kb)
+        remember_response(question, kb, answer, detail)
+    return answer, detail
+
+
+def prepare_cached_batch(questions, kb: KBSnapshot):
+    """prepare_answers() behind the response cache; only misses are prepared."""
+    prepared = [cached_response(q, kb) for q in questions]
+    misses = [i for i, (answer, _) in enumerate(prepared) if answer is None]
+    if misses:
+        for i, result in zip(misses, prepare_answers([questions[i] for i in misses], kb)):
+            prepared[i] = result
+            remember_response(questions[i], kb, *result)
+    return prepared
+
+
+def cached_llm_answer(retrieval, kb: KBSnapshot):
+    # a request still on the previous snapshot neither reads nor writes the cache
+    if answer_cache is None or answer_cache.dataset_version != kb.version:
+        return None
+    with timed("answer_cache"):
+        try:
+            cached = answer_cache.lookup(retrieval["query_embedding"], retrieval["kb_ids"])
+        except sqlite3.Error as exc:
+            # e.g. another worker held the shared file past the busy timeout
+            logger.warning("answer cache lookup failed: %s", exc)
+            return None
+    if cached:
+        answered_by("answer_cache")
+    return cached
+
+
+def store_llm_answer(retrieval, answer, kb: KBSnapshot):
+    if answer_cache is not None and answer_cache.dataset_version == kb.version:
+        try:
+            answer_cache.store(retrieval["query_embedding"], retrieval["kb_ids"], answer)
+        except sqlite3.Error as exc:
+            logger.warning("answer cache store failed: %s", exc)
+
+
+async def cached_llm_answer_async(retrieval, kb: KBSnapshot):
+    # SQLite work goes to a thread: another worker may hold the shared file's lock
+    if answer_cache is None:
+        return None
+    return await asyncio.to_thread(cached_llm_answer, retrieval, kb)
+
+
+async def store_llm_answer_async(retrieval, answer, kb: KBSnapshot):
+    if answer_cache is not None:
+        await asyncio.to_thread(store_llm_answer, retrieval, answer, kb)
+
+
+def llm_or_fallback(question, retrieval, history=None, kb: KBSnapshot = None) -> str:
+    """Cached or fresh LLM answer for a prepared retrieval, else a static fallback."""
+    kb = kb or current_snapshot()
+    if retrieval is not None:
+        cached = cached_llm_answer(retrieval, kb)
+        if cached:
+            return cached
+        with timed("llm"):
+            llm_answer = generate_llm_answer(question, retrieval["context"], history)
+        if llm_answer:
+            if llm_answer.startswith("LLM Error:"):
+                answered_by("llm_error")
+            else:
+                answered_by("llm")
+                store_llm_answer(retrieval, llm_answer, kb)
+            return llm_answer
+
+    answered_by("fallback")
+    return fallback_answer(question, kb)
+
+
+async def llm_or_fallback_async(question, retrieval, history=None, kb: KBSnapshot = None) -> str:
+    kb = kb or current_snapshot()
+    if retrieval is not None:
+        cached = await cached_llm_answer_async(retrieval, kb)
+        if cached:
+            return cached
+        with timed("llm"):
+            llm_answer = await llm_client.generate(question, retrieval["context"], history)
+        if llm_answer:
+            answered_by("llm")
+            await store_llm_answer_async(retrieval, llm_answer, kb)
+            return llm_answer
+
+    answered_by("fallback")
+    return fallback_answer(question, kb)
+
+
+def chatbot(question: str, history=None) -> str:
+    """
+    Main chatbot function. Backend should call get_ai_response(query, history).
+    The whole request runs on the KB snapshot current when it started.
+    """
+    kb = current_snapshot()
+    answer, retrieval = prepare_cached(question, kb)
+    if answer is not None:
+        return answer
+    return llm_or_fallback(question, retrieval, history, kb)
+
+
+async def chatbot_async(question: str, history=None) -> str:
+    """
+    Async variant for the API: the CPU-bound steps run in a worker thread and
+    the LLM call is awaited, so rule and semantic answers never queue behind
+    slow LLM responses. A timed-out, failing or circuit-broken LLM call falls
+    through to the static fallbacks. Response-cache hits skip the thread hop.
+    """
+    kb = current_snapshot()
+    answer, retrieval = cached_response(question, kb)
+    if answer is None:
+        answer, retrieval = await asyncio.to_thread(prepare_answer, question, kb)
+        remember_response(question, kb, answer, retrieval)
+    if answer is not None:
+        return answer
+    return await llm_or_fallback_async(question, retrieval, history, kb)
+
+
+async def chatbot_stream(question: str, history=None):
+    """
+    Streaming chatbot_async: yields the reply as text chunks. Rule, lexical,
+    semantic, cached and fallback answers come as one chunk straight away; a
+    fresh LLM answer is yielded chunk by chunk as it is generated and cached
+    once complete. An LLM failure before the first chunk falls back; one
+    mid-answer is raised, so the caller can discard the partial reply.
+    """
+    kb = current_snapshot()
+    answer, retrieval = cached_response(question, kb)
+    if answer is None:
+        answer, retrieval = await asyncio.to_thread(prepare_answer, question, kb)
+        remember_response(question, kb, answer, retrieval)
+    if answer is not None:
+        yield answer
+        return
+
+    if retrieval is not None:
+        cached = await cached_llm_answer_async(retrieval, kb)
+        if cached:
+            yield cached
+            return
+        parts = []
+        try:
+            with timed("llm"):
+                async for chunk in llm_client.stream(question, retrieval["context"], history):
+                    parts.append(chunk)
+                    yield chunk
+        except Exception:
+            answered_by("llm_error")
+            if parts:
+                raise
+        if parts:
+            answered_by("llm")
+            await store_llm_answer_async(retrieval, "".join(parts), kb)
+            return
+
+    answered_by("fallback")
+    yield fallback_answer(question, kb)
+
+
+def chatbot_batch(questions, histories=None):
+    """
+    Answers many questions at once (see prepare_answers); leftovers go to the
+    LLM on up to CHAT_BATCH_LLM_CONCURRENCY threads. Replies are in input order.
+    """
+    histories = histories or [None] * len(questions)
+    kb = current_snapshot()
+    prepared = prepare_cached_batch(questions, kb)
+    replies = [answer for answer, _ in prepared]
+    leftovers = [i for i, (answer, _) in enumerate(prepared) if answer is None]
+    if leftovers:
+        with ThreadPoolExecutor(max_workers=CHAT_BATCH_LLM_CONCURRENCY) as pool:
+            done = pool.map(lambda i: llm_or_fallback(questions[i], prepared[i][1], histories[i], kb), leftovers)
+            for i, reply in zip(leftovers, done):
+                replies[i] = reply
+    return replies
+
+
+async def chatbot_batch_async(questions, histories=None):
+    """
+    Async chatbot_batch for the API. At most CHAT_BATCH_LLM_CONCURRENCY of the
+    batch's LLM calls are in flight (on top of the global LLM limit), so one
+    large batch neither starves /chat nor runs into the per-call deadline
+    while queued.
+    """
+    histories = histories or [None] * len(questions)
+    kb = current_snapshot()
+    prepared = await asyncio.to_thread(prepare_cached_batch, questions, kb)
+    limit = asyncio.Semaphore(CHAT_BATCH_LLM_CONCURRENCY)
+
+    async def finish(i):
+        answer, retrieval = prepared[i]
+        if answer is not None:
+            return answer
+        async with limit:
+            return await llm_or_fallback_async(questions[i], retrieval, histories[i], kb)
+
+    return list(await asyncio.gather(*(finish(i) for i in range(len(questions)))))
+
+
+def warm_up():
+    """
+    Runs the real semantic path (encoder load, encode, vector search) once so
+    the first user request does not pay for it. The LLM is not called.
+    """
+    with stage("warm-up encode + search"):
+        return current_snapshot().kb_index.search(encode_query("which course should a beginner take"), top_k=TOP_K)
+
+
+def reload_kb(force=False):
+    """
+    Rebuilds the KB snapshot from DATA_FILE and swaps it in if the dataset
+    changed (always with force). Runs on the caller's thread, never on the
+    request path; requests already running keep their old snapshot. Returns
+    the current snapshot's info() plus "reloaded". If the build fails the
+    current snapshot stays in place and the error is raised.
+    """
+    global _snapshot
+    with _reload_lock:
+        if not force and os.path.exists(DATA_FILE) and file_sha256(DATA_FILE) == _snapshot.version:
+            return {"reloaded": False, **_snapshot.info()}
+        snapshot = KBSnapshot(DATA_FILE, ARTIFACT_FILE)
+        if answer_cache is not None:
+            answer_cache.set_dataset_version(snapshot.version)
+        if response_cache is not None:
+            response_cache.set_dataset_version(snapshot.version)
+        _snapshot = snapshot
+    logger.info("KB reloaded: dataset %s, %d texts in %.2fs",
+                snapshot.version[:12], len(snapshot.texts), snapshot.build_seconds)
+    return {"reloaded": True, **snapshot.info()}
+
+
 def get_ai_response(query: str, history=None) -> str:
-    return chatbot(query, history)
+    with trace_request(query):
+        return chatbot(query, history)
+
+
+async def get_ai_response_async(query: str, history=None) -> str:
+    with trace_request(query):
+        return await chatbot_async(query, history)
+
+
+async def get_ai_response_stream(query: str, history=None):
+    with trace_request(query):
+        async for chunk in chatbot_stream(query, history):
+            yield chunk
+
+
+def get_ai_responses(queries, histories=None):
+    # one trace per batch: stages add up over the items, branch is "batch"
+    with trace_request(f"batch of {len(queries)}"):
+        replies = chatbot_batch(queries, histories)
+        answered_by("batch")
+        return replies
+
+
+async def get_ai_responses_async(queries, histories=None):
+    with trace_request(f"batch of {len(queries)}"):
+        replies = await chatbot_batch_async(queries, histories)
+        answered_by("batch")
+        return replies
@@ -0,0 +1,126 @@
+"""
+Course title index for fuzzy course-name lookups.
+
+Built once per dataset. Each character of the catalog gets a posting column
+holding its count in every lowercased title, so a single pass over the query's
+characters yields the shared-character count for every title at once. That
+count is difflib's quick_ratio upper bound, which narrows the catalog to a
+short list; a bit-parallel LCS bound prunes it further before the real
+SequenceMatcher.ratio() is run. Results are
+identical to calling difflib.get_close_matches(q, titles, n=1, cutoff) per
+category in dataset order.
+"""
+from collections import Counter
+from difflib import SequenceMatcher
+
+import numpy as np
+
+
+class _LCSBound:
+    """Bit-parallel longest-common-subsequence length against a fixed query."""
+
+    def __init__(self, q):
+        self.masks = {}
+        for i, ch in enumerate(q):
+            self.masks[ch] = self.masks.get(ch, 0) | (1 << i)
+        self.n = len(q)
+        self.full = (1 << self.n) - 1
+
+    def length(self, text):
+        masks, full = self.masks, self.full
+        v = full
+        for ch in text:
+            u = v & masks.get(ch, 0)
+            v = ((v + u) | (v - u)) & full
+        return self.n - v.bit_count()
+
+
+class CourseIndex:
+    def __init__(self, courses_info, cutoff=0.5):
+        if not 0.0 < cutoff <= 1.0:
+            raise ValueError("cutoff must be in (0, 1]")
+        self.cutoff = cutoff
+        self.titles = []    # lowercased title per entry
+        self.ranks = []     # category order per entry
+        self.courses = []   # first course dict with that (category, title)
+
+        seen = set()
+        for rank, course_list in enumerate(courses_info.values()):
+            for c in course_list:
+                title = (c.get("title") or "").lower()
+                if not title or (rank, title) in seen:
+                    continue
+                seen.add((rank, title))
+                self.titles.append(title)
+                self.ranks.append(rank)
+                self.courses.append(c)
+
+        self.ranks = np.array(self.ranks, dtype=np.int64)
+        self.lengths = np.array([len(t) for t in self.titles], dtype=np.float64)
+
+        # character -> count of that character in every title
+        postings = {}
+        for tid, title in enumerate(self.titles):
+            for ch, cnt in Counter(title).items():
+                col = postings.get(ch)
+                if col is None:
+                    col = postings[ch] = np.zeros(len(self.titles), dtype=np.int32)
+                col[tid] = cnt
+        self.postings = postings
+
+    def __len__(self):
+        return len(self.titles)
+
+    def candidates(self, q):
+        """
+        Returns (entry ids, upper bounds) for titles whose quick_ratio with q
+        reaches the cutoff.
+        """
+        common = np.zeros(len(self.titles), dtype=np.float64)
+        for ch, cnt in Counter(q).items():
+            col = self.postings.get(ch)
+            if col is not None:
+                common += np.minimum(col, cnt)
+        bounds = 2.0 * common / (len(q) + self.lengths)
+        ids = np.nonzero(bounds >= self.cutoff)[0]
+        return ids, bounds[ids]
+
+    def find(self, q):
+        """
+        Returns the matched course dict for a lowercased query, or None.
+        """
+        if not self.titles or not q:
+            return None
+        ids, bounds = self.candidates(q)
+        if not len(ids):
+            return None
+
+        sm = SequenceMatcher()
+        sm.set_seq2(q)
+        lcs = _LCSBound(q)
+        lq = len(q)
+        # entry ids are grouped by category, so walk categories in dataset
+        # order and stop at the first one holding a match
+        ranks = self.ranks[ids]
+        groups = np.split(np.arange(len(ids)), np.flatnonzero(np.diff(ranks)) + 1)
+        for group in groups:
+            best = None
+            # most promising bound first; stop once no bound can beat the best
+            for i in group[np.argsort(-bounds[group], kind="stable")]:
+                if best is not None and bounds[i] < best[0]:
+                    break
+                tid = int(ids[i])
+                title = self.titles[tid]
+                # matching blocks form a common subsequence, so the LCS
+                # length is a tighter (still exact) bound than quick_ratio
+                tight = 2.0 * lcs.length(title) / (lq + len(title))
+                if tight < self.cutoff or (best is not None and tight < best[0]):
+                    continue
+                sm.set_seq1(title)
+                score = sm.ratio()
+                # get_close_matches breaks ties on the larger title
+                if score >= self.cutoff and (best is None or (score, title) > best[:2]):
+                    best = (score, title, tid)
+            if best:
+                return self.courses[best[2]]
+        return None
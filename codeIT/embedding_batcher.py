@@ -0,0 +1,109 @@
+"""
+Micro-batching front end for the sentence-transformer encoder.
+
+Concurrent callers hand their query to a single worker thread, which waits up
+to `max_wait_ms` (or until `max_batch` items are queued), runs one batched
+encode and hands each caller its own row. Only the worker touches the model,
+so torch intra-op threads are not oversubscribed by the request thread pool.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+_STOP = object()
+
+
+def configure_torch_threads(num_threads):
+    """Caps torch intra-op threads; 0 or None leaves torch's default."""
+    if not num_threads:
+        return
+    import torch
+
+    torch.set_num_threads(num_threads)
+
+
+class EmbeddingBatcher:
+    def __init__(self, encode_batch, max_batch=32, max_wait_ms=3.0):
+        """
+        encode_batch(list_of_texts) must return an array of shape (N, D).
+        """
+        self._encode_batch = encode_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self.batches = 0
+        self.items = 0
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text):
+        fut = Future()
+        self._queue.put((text, fut))
+        return fut
+
+    def submit_many(self, texts):
+        """Queues texts together; the worker encodes them in max_batch chunks."""
+        futs = [Future() for _ in texts]
+        for text, fut in zip(texts, futs):
+            self._queue.put((text, fut))
+        return futs
+
+    def encode_many(self, texts, timeout=None):
+        """Blocks until every text is encoded; returns shape (N, D)."""
+        return np.stack([fut.result(timeout) for fut in self.submit_many(texts)])
+
+    def encode(self, text, timeout=None):
+        """Blocks until the batch holding text is encoded; returns shape (D,)."""
+        return self.submit(text).result(timeout)
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+        }
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # finish this batch, then let _run see the stop marker
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = self._collect(first)
+
+            # identical texts in one window are encoded once
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                embs = self._encode_batch(texts)
+            except BaseException as exc:
+                for _, fut in batch:
+                    fut.set_exception(exc)
+                continue
+
+            rows = dict(zip(texts, embs))
+            for text, fut in batch:
+                fut.set_result(rows[text])
+            self.batches += 1
+            self.items += len(batch)
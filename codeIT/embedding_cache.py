@@ -0,0 +1,150 @@
+"""
+Bounded LRU + TTL cache of query embeddings.
+
+Keys are normalized query text; every lookup also names the embedding model so
+the cache empties itself when EMB_MODEL_NAME changes. Optionally persisted to
+an .npz file so warm entries survive restarts.
+"""
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def normalize_query(text):
+    return " ".join(text.lower().split())
+
+
+class QueryEmbeddingCache:
+    def __init__(self, max_size=2048, ttl=None, path=None, model_name=None):
+        self.max_size = max_size
+        self.ttl = ttl or None
+        self.path = path or None
+        self.model_name = model_name
+        self._entries = OrderedDict()  # key -> (embedding, stored_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        if self.path:
+            self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _check_model(self, model_name):
+        # caller holds the lock
+        if model_name != self.model_name:
+            self._entries.clear()
+            self.model_name = model_name
+
+    def get(self, text, model_name):
+        key = normalize_query(text)
+        with self._lock:
+            self._check_model(model_name)
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl and time.time() - entry[1] > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, text, model_name, embedding):
+        key = normalize_query(text)
+        embedding = np.asarray(embedding, dtype=np.float32)
+        embedding.setflags(write=False)
+        with self._lock:
+            self._check_model(model_name)
+            self._entries[key] = (embedding, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, text, model_name, encode):
+        """
+        Returns the cached embedding for text, calling encode(normalized_text)
+        on a miss. encode runs outside the lock.
+        """
+        emb = self.get(text, model_name)
+        if emb is None:
+            emb = encode(normalize_query(text))
+            self.put(text, model_name, emb)
+        return emb
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    def save(self):
+        """Atomically writes the cache to self.path (no-op without a path)."""
+        if not self.path:
+            return
+        with self._lock:
+            keys = list(self._entries.keys())
+            embs = [e[0] for e in self._entries.values()]
+            stamps = [e[1] for e in self._entries.values()]
+            model_name = self.model_name or ""
+        # unique temp file: every worker saves from atexit, possibly at the same time
+        fd, tmp = tempfile.mkstemp(suffix=".npz", prefix=os.path.basename(self.path) + ".",
+                                   dir=os.path.dirname(os.path.abspath(self.path)))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    model_name=np.array(model_name),
+                    keys=np.array(keys, dtype=str),
+                    embeddings=np.stack(embs) if embs else np.zeros((0, 0), dtype=np.float32),
+                    stored_at=np.array(stamps, dtype=np.float64),
+                )
+            os.replace(tmp, self.path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+    def load(self):
+        """Loads entries saved for the same model; anything else is ignored."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if str(data["model_name"]) != self.model_name:
+                    return
+                now = time.time()
+                rows = zip(data["keys"].tolist(), data["embeddings"], data["stored_at"].tolist())
+                with self._lock:
+                    for key, emb, stored_at in rows:
+                        if self.ttl and now - stored_at > self.ttl:
+                            continue
+                        emb.setflags(write=False)
+                        self._entries[key] = (emb, stored_at)
+                    while len(self._entries) > self.max_size:
+                        self._entries.popitem(last=False)
+        except Exception:
+            # a corrupt cache file only costs a cold start
+            pass
@@ -0,0 +1,247 @@
+"""
+On-disk embedding store shared by every worker through the page cache.
+
+Layout (all offsets 64-byte aligned):
+    magic  b"CITEMB01"
+    uint32 little-endian header length, then a JSON header with model_name,
+           dtype, count, dim and the offsets below
+    ID table    JSON list of row keys (content hashes)
+    extra       optional JSON object (e.g. KB texts/answers for kb_artifact)
+    scales      float32[count], only for int8 (per-row dequantization scale)
+    matrix      dtype[count, dim], rows L2-normalized before quantization
+
+open_store() maps the scales and matrix with np.memmap (read-only), so N
+uvicorn workers hold one copy of the matrix between them.
+
+A mapped file is never overwritten: builders write a new versioned file
+(see versioned_path) under store_lock() and then repoint `path`, a small
+pointer file holding that file's name, which open_store() follows.
+"""
+import json
+import os
+import struct
+import tempfile
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+MAGIC = b"CITEMB01"
+POINTER_MAGIC = b"CITPTR01"
+STORE_DTYPES = ("float32", "float16", "int8")  # most precise first
+_ALIGN = 64
+
+
+def _align(n):
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def at_least_as_precise(dtype, target):
+    """True if rows stored as dtype can stand in for freshly encoded target rows."""
+    return STORE_DTYPES.index(dtype) <= STORE_DTYPES.index(target)
+
+
+def quantize(embeddings, dtype):
+    """
+    Returns (matrix, scales) for L2-normalized rows; scales is None unless int8.
+    """
+    if dtype not in STORE_DTYPES:
+        raise ValueError(f"Unknown store dtype {dtype!r}; expected one of {STORE_DTYPES}")
+    emb = np.asarray(embeddings, dtype=np.float32)
+    if emb.ndim != 2:
+        emb = emb.reshape(0, 0)
+    norms = np.linalg.norm(emb, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    emb = emb / norms
+    if dtype != "int8":
+        return emb.astype(dtype), None
+    scales = np.abs(emb).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    matrix = np.clip(np.rint(emb / scales[:, None]), -127, 127).astype(np.int8)
+    return matrix, scales.astype(np.float32)
+
+
+def _write_atomic(path, write):
+    """Calls write(f) on a unique temp file next to path, then renames it over path."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def write_store(path, keys, embeddings, dtype="float16", model_name="", extra=None):
+    """Writes a store atomically (unique temp file + rename)."""
+    matrix, scales = quantize(embeddings, dtype)
+    count, dim = matrix.shape if matrix.ndim == 2 else (0, 0)
+    ids = json.dumps(list(keys)).encode("utf-8")
+    extra_bytes = json.dumps(extra or {}, ensure_ascii=False).encode("utf-8")
+
+    header = {"version": 1, "model_name": model_name, "dtype": dtype, "count": count, "dim": dim}
+    # offsets depend on the header size, so size it with placeholders first
+    header.update(ids_offset=0, ids_length=len(ids), extra_offset=0, extra_length=len(extra_bytes),
+                  scales_offset=0, matrix_offset=0)
+    prefix = len(MAGIC) + 4 + len(json.dumps(header)) + 96
+    header["ids_offset"] = _align(prefix)
+    header["extra_offset"] = _align(header["ids_offset"] + len(ids))
+    header["scales_offset"] = _align(header["extra_offset"] + len(extra_bytes))
+    header["matrix_offset"] = _align(header["scales_offset"] + (scales.nbytes if scales is not None else 0))
+    header_bytes = json.dumps(header).encode("utf-8")
+    assert len(MAGIC) + 4 + len(header_bytes) <= header["ids_offset"]
+
+    def write(f):
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        f.seek(header["ids_offset"])
+        f.write(ids)
+        f.seek(header["extra_offset"])
+        f.write(extra_bytes)
+        if scales is not None:
+            f.seek(header["scales_offset"])
+            f.write(scales.tobytes())
+        f.seek(header["matrix_offset"])
+        f.write(np.ascontiguousarray(matrix).tobytes())
+
+    _write_atomic(path, write)
+
+
+def versioned_path(path, version):
+    """kb_artifact.store -> kb_artifact.<version[:16]>.store"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{version[:16]}{ext}"
+
+
+def read_pointer(path):
+    """Returns the store file a pointer file names, or None if path is not a pointer."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read(4096)
+    except FileNotFoundError:
+        return None
+    if not data.startswith(POINTER_MAGIC):
+        return None
+    name = data[len(POINTER_MAGIC):].decode("utf-8").strip()
+    return os.path.join(os.path.dirname(path), name)
+
+
+def write_pointer(path, target):
+    """Points path at the store file target (which must sit in the same directory)."""
+    current = read_pointer(path)
+    if current and os.path.basename(current) == os.path.basename(target):
+        return
+    data = POINTER_MAGIC + b"\n" + os.path.basename(target).encode("utf-8") + b"\n"
+    for attempt in range(20):
+        try:
+            _write_atomic(path, lambda f: f.write(data))
+            return
+        except PermissionError:
+            # Windows refuses to replace a file another process is reading
+            if attempt == 19:
+                raise
+            time.sleep(0.05)
+
+
+def prune_versions(path, keep):
+    """Deletes versioned files of path other than keep; files still in use are left."""
+    root, ext = os.path.splitext(os.path.basename(path))
+    directory = os.path.dirname(os.path.abspath(path))
+    keep = {os.path.basename(k) for k in keep if k}
+    for name in os.listdir(directory):
+        if name.startswith(root + ".") and name.endswith(ext) and name != os.path.basename(path) and name not in keep:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+@contextmanager
+def store_lock(path):
+    """
+    Exclusive inter-process lock on path + ".lock", so one process builds a
+    store while the others wait. The OS drops it if the holder dies.
+    """
+    with open(f"{path}.lock", "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after ~10s; keep waiting for the builder
+                    pass
+        else:
+            import fcntl
+
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class EmbeddingStore:
+    def __init__(self, keys, matrix, scales, dtype, model_name, extra=None, path=None):
+        self.path = path
+        self.keys = keys
+        self.matrix = matrix
+        self.scales = scales
+        self.dtype = dtype
+        self.model_name = model_name
+        self.extra = extra or {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def dim(self):
+        return self.matrix.shape[1]
+
+    def dequantize(self, rows=None):
+        """Returns float32 rows (all rows when rows is None)."""
+        mat = self.matrix if rows is None else self.matrix[rows]
+        out = np.asarray(mat, dtype=np.float32)
+        if self.scales is not None:
+            out = out * (self.scales if rows is None else self.scales[rows])[:, None]
+        return out
+
+
+def open_store(path):
+    """Maps the store at path, following path if it is a pointer file."""
+    path = read_pointer(path) or path
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an embedding store")
+        (header_len,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(header_len))
+        f.seek(header["ids_offset"])
+        keys = json.loads(f.read(header["ids_length"]))
+        extra = {}
+        if header.get("extra_length"):
+            f.seek(header["extra_offset"])
+            extra = json.loads(f.read(header["extra_length"]).decode("utf-8"))
+
+    count, dim, dtype = header["count"], header["dim"], header["dtype"]
+    if count == 0:
+        matrix = np.zeros((0, dim), dtype=dtype)
+        scales = None
+    else:
+        matrix = np.memmap(path, dtype=dtype, mode="r", offset=header["matrix_offset"], shape=(count, dim))
+        scales = None
+        if dtype == "int8":
+            scales = np.memmap(path, dtype=np.float32, mode="r", offset=header["scales_offset"], shape=(count,))
+    return EmbeddingStore(keys, matrix, scales, dtype, header["model_name"], extra, path)
@@ -1,7 +1,7 @@
 import { useCallback, useEffect, useMemo, useState } from "react";
 import Header from "./components/Header.jsx";
 import ChatWindow from "./components/ChatWindow.jsx";
-import { sendMessage, fetchHealth } from "./services/api.js";
+import { streamMessage, fetchHealth } from "./services/api.js";
 
 const SESSION_KEY = "codeit-chatbot-session";
 const HISTORY_KEY = "codeit-chatbot-history";
@@ -30,6 +30,7 @@ const App = () => {
   const [sessionId, setSessionId] = useState(() => readLocalValue(SESSION_KEY, null));
   const [history, setHistory] = useState(() => readLocalValue(HISTORY_KEY, []));
   const [isTyping, setIsTyping] = useState(false);
+  const [streamingReply, setStreamingReply] = useState(null);
   const [error, setError] = useState(null);
   const [serviceOnline, setServiceOnline] = useState(true);
 
@@ -68,7 +69,16 @@ const App = () => {
       setIsTyping(true);
 
       try {
-        const response = await sendMessage({ message, sessionId });
+        let reply = "";
+        const response = await streamMessage({
+          message,
+          sessionId,
+          onDelta: (text) => {
+            reply += text;
+            setIsTyping(false);
+            setStreamingReply(reply);
+          },
+        });
         const nextSessionId = response.session_id;
         const nextHistory = response.history.map((turn) => ({
           role: turn.role,
@@ -84,6 +94,7 @@ const App = () => {
         setServiceOnline(false);
       } finally {
         setIsTyping(false);
+        setStreamingReply(null);
       }
     },
     [history, sessionId]
@@ -102,7 +113,14 @@ const App = () => {
       <div className="status-chip" data-status={serviceOnline ? "online" : "offline"}>
         Service {statusMessage}
       </div>
-      <ChatWindow history={history} onSend={handleSend} onReset={handleReset} isTyping={isTyping} error={error} />
+      <ChatWindow
+        history={history}
+        streamingReply={streamingReply}
+        onSend={handleSend}
+        onReset={handleReset}
+        isTyping={isTyping}
+        error={error}
+      />
     </div>
   );
 };
@@ -3,7 +3,7 @@ import { motion } from "framer-motion";
 import clsx from "clsx";
 import MessageBubble from "./MessageBubble.jsx";
 
-const ChatWindow = ({ history, onSend, onReset, isTyping, error }) => {
+const ChatWindow = ({ history, streamingReply, onSend, onReset, isTyping, error }) => {
   const [input, setInput] = useState("");
   const messageListRef = useRef(null);
 
@@ -11,7 +11,7 @@ const ChatWindow = ({ history, onSend, onReset, isTyping, error }) => {
     if (messageListRef.current) {
       messageListRef.current.scrollTo({ top: messageListRef.current.scrollHeight, behavior: "smooth" });
     }
-  }, [history, isTyping]);
+  }, [history, streamingReply, isTyping]);
 
   const handleSubmit = (event) => {
     event.preventDefault();
@@ -50,6 +50,8 @@ const ChatWindow = ({ history, onSend, onReset, isTyping, error }) => {
           <MessageBubble key={`${turn.role}-${index}-${turn.timestamp}`} role={turn.role} content={turn.content} timestamp={turn.timestamp} />
         ))}
 
+        {streamingReply && <MessageBubble role="assistant" content={streamingReply} />}
+
         {isTyping && (
           <motion.div
             className="typing-indicator"
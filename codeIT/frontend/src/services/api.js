@@ -24,6 +24,64 @@ export async function sendMessage({ message, sessionId }) {
   return response.json();
 }
 
+/**
+ * Stream a reply from /chat/stream (Server-Sent Events over a POST).
+ * onDelta receives each text chunk as it arrives; resolves with the final
+ * payload, shaped like the /chat response.
+ */
+export async function streamMessage({ message, sessionId, onDelta }) {
+  const response = await fetch(`${apiBaseUrl}/chat/stream`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      Accept: "text/event-stream",
+    },
+    body: JSON.stringify({
+      message: message,
+      session_id: sessionId ?? null,
+    }),
+  });
+
+  if (!response.ok || !response.body) {
+    const detail = await response.json().catch(() => null);
+    throw new Error(detail?.detail || "Failed to reach chatbot service.");
+  }
+
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) {
+      break;
+    }
+    buffer += value;
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      let event = "message";
+      let data = "";
+      for (const line of block.split("\n")) {
+        if (line.startsWith("event: ")) {
+          event = line.slice(7);
+        } else if (line.startsWith("data: ")) {
+          data += line.slice(6);
+        }
+      }
+      const payload = data ? JSON.parse(data) : {};
+      if (event === "delta") {
+        onDelta?.(payload.text);
+      } else if (event === "done") {
+        reader.cancel();
+        return payload;
+      } else if (event === "error") {
+        throw new Error(payload.detail || "Failed to generate response.");
+      }
+    }
+  }
+  throw new Error("The reply stream ended unexpectedly.");
+}
+
 /**
  * Health check route
  */
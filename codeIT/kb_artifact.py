@@ -0,0 +1,97 @@
+"""
+Precompiled knowledge-base artifact.
+
+`python kb_artifact.py` turns codeit_dataset.json into one versioned file
+(kb_artifact.<hash>.store, which the kb_artifact.store pointer names): the dataset itself, the grouped KB (each unique answer
+once, its paraphrase texts as rows, and a row -> answer id array, see
+kbuilder.build_kb_index_from_dataset) and the row embeddings, in the
+embedding_store format. The server loads only this file,
+memory-mapped, and needs neither kbuilder nor the encoder to start. The
+course and vector indexes are rebuilt from it at load time (milliseconds).
+
+If the artifact is missing, was built for another dataset/model, or has an
+older ARTIFACT_VERSION, load_kb() rebuilds it (re-encoding only texts whose
+content changed).
+"""
+import argparse
+import os
+import time
+
+from embedding_store import open_store
+from kbuilder import build_kb_index_from_dataset
+from startup_profile import stage
+from utils import (
+    EMB_MODEL_NAME,
+    EMB_STORE_DTYPE,
+    EMB_STORE_FILE,
+    create_or_load_embeddings,
+    file_sha256,
+    load_json,
+)
+
+ARTIFACT_VERSION = 2
+DATA_FILE = "codeit_dataset.json"
+ARTIFACT_FILE = EMB_STORE_FILE
+
+
+def build_artifact(data_file=DATA_FILE, artifact_file=ARTIFACT_FILE, dtype=None):
+    """Builds (or refreshes) the artifact and returns it opened."""
+    dataset = load_json(data_file)
+    kb_answers, kb_texts, kb_answer_ids = build_kb_index_from_dataset(dataset)
+    extra = {
+        "artifact_version": ARTIFACT_VERSION,
+        "dataset_version": file_sha256(data_file),
+        "dataset": dataset,
+        "texts": kb_texts,
+        "answers": kb_answers,
+        "answer_ids": kb_answer_ids,
+    }
+    return create_or_load_embeddings(kb_texts, path=artifact_file, dtype=dtype, extra=extra)
+
+
+def is_current(store, data_file=DATA_FILE):
+    extra = store.extra
+    if extra.get("artifact_version") != ARTIFACT_VERSION or store.model_name != EMB_MODEL_NAME:
+        return False
+    if os.path.exists(data_file) and extra.get("dataset_version") != file_sha256(data_file):
+        return False
+    return True
+
+
+def load_kb(data_file=DATA_FILE, artifact_file=ARTIFACT_FILE):
+    """
+    Returns the opened artifact, rebuilding it first when it is stale.
+    The dataset file is optional once an artifact exists.
+    """
+    store = None
+    if os.path.exists(artifact_file):
+        with stage("open KB artifact"):
+            try:
+                store = open_store(artifact_file)
+            except Exception:
+                store = None
+    if store is None or not is_current(store, data_file):
+        store = None  # unmap it: a pre-pointer artifact file gets replaced by the pointer
+        with stage("build KB artifact"):
+            store = build_artifact(data_file, artifact_file)
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the dataset into the KB artifact.")
+    parser.add_argument("--dataset", default=DATA_FILE)
+    parser.add_argument("--output", default=ARTIFACT_FILE)
+    parser.add_argument("--dtype", default=EMB_STORE_DTYPE, choices=("float32", "float16", "int8"))
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = build_artifact(args.dataset, args.output, dtype=args.dtype)
+    print(
+        f"wrote {store.path}: {len(store)} texts for {len(store.extra['answers'])} answers, dim {store.dim}, {store.dtype}, "
+        f"{os.path.getsize(store.path) / 1024:.1f} KiB in {time.perf_counter() - start:.2f}s "
+        f"(dataset {store.extra['dataset_version'][:12]})"
+    )
+
+
+if __name__ == "__main__":
+    main()
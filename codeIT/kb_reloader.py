@@ -0,0 +1,68 @@
+"""
+Background watcher that hot-reloads the KB when codeit_dataset.json changes.
+
+A daemon thread checks the file's mtime and size every interval seconds;
+only when they change is the file hashed, and only when the hash differs
+from the last one seen is on_change() called (chatbot.reload_kb, which builds
+the new snapshot on this thread and swaps it in). Touching the file without
+editing it therefore costs one hash, not a rebuild. A failing on_change() is
+logged and retried on the next change.
+"""
+import logging
+import os
+import threading
+
+from utils import file_sha256
+
+logger = logging.getLogger("codeit-chatbot.kb")
+
+
+class DatasetWatcher:
+    def __init__(self, path, on_change, interval=5.0):
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._stat = self._file_stat()
+        self._hash = file_sha256(path) if self._stat else None
+
+    def _file_stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def check(self):
+        """Runs one poll; returns True if on_change() was called and succeeded."""
+        stat = self._file_stat()
+        if stat is None or stat == self._stat:
+            return False
+        self._stat = stat
+        digest = file_sha256(self.path)
+        if digest == self._hash:
+            return False
+        try:
+            self.on_change()
+        except Exception:
+            logger.exception("KB reload after a change to %s failed; keeping the current KB", self.path)
+            return False
+        self._hash = digest
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="kb-reloader", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -81,17 +81,19 @@ def build_kb_texts_from_dataset(ds):
             desc = c.get("description", "") or c.get("short_description", "") or c.get("summary", "")
 
             if title:
+                # one shared answer for every phrasing that just names the course
+                overview = f"{title} — Price: {price}. URL: {url}"
                 texts.append(title)
-                answers.append(f"{title} — Price: {price}. URL: {url}")
+                answers.append(overview)
 
                 texts.append(f"price of {title}")
                 answers.append(f"The price of '{title}' is {price}.")
 
                 texts.append(f"what is {title}")
-                answers.append(f"{title}: {desc} Price: {price}. URL: {url}" if desc else f"{title} — Price: {price}. URL: {url}")
+                answers.append(f"{title}: {desc} Price: {price}. URL: {url}" if desc else overview)
 
                 texts.append(f"{category} course {title}")
-                answers.append(f"{title} — {price}. {url}")
+                answers.append(overview)
 
     # Common FAQ
     faq = {
@@ -130,3 +132,46 @@ def build_kb_texts_from_dataset(ds):
                 answers.append(f"In {course}, you might work on projects like: {title} — {desc}")
 
     return texts, answers
+
+
+def group_kb_texts(texts, answers):
+    """
+    Groups flat (text, answer) pairs by answer. Returns (answers, groups):
+    each unique answer once, and for each one the list of its distinct
+    paraphrase texts (case-insensitive duplicates dropped), in first-seen order.
+    """
+    unique_answers = []
+    groups = []
+    answer_ids = {}
+    seen = set()
+    for text, answer in zip(texts, answers):
+        aid = answer_ids.get(answer)
+        if aid is None:
+            aid = answer_ids[answer] = len(unique_answers)
+            unique_answers.append(answer)
+            groups.append([])
+        key = (aid, text.strip().lower())
+        if key not in seen:
+            seen.add(key)
+            groups[aid].append(text)
+    return unique_answers, groups
+
+
+def flatten_kb_groups(groups):
+    """
+    Returns (texts, answer_ids): one row per paraphrase, rows of a group
+    contiguous and answer_ids non-decreasing (what VectorIndex expects).
+    """
+    texts = [t for group in groups for t in group]
+    answer_ids = [aid for aid, group in enumerate(groups) for _ in group]
+    return texts, answer_ids
+
+
+def build_kb_index_from_dataset(ds):
+    """
+    Compact KB: (answers, texts, answer_ids) with each answer stored once and
+    texts[i] a paraphrase of answers[answer_ids[i]].
+    """
+    answers, groups = group_kb_texts(*build_kb_texts_from_dataset(ds))
+    texts, answer_ids = flatten_kb_groups(groups)
+    return answers, texts, answer_ids
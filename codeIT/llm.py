@@ -1,29 +1,87 @@
+import asyncio
 import os
-import google.generativeai as genai
+import time
+import weakref
+from collections import deque
+
 from dotenv import load_dotenv
 
+from embedding_cache import normalize_query
+from metrics import prompt_size
+from singleflight import AsyncSingleFlight, SingleFlight
+from startup_profile import stage
+
 # load .env file
 load_dotenv()
 
-# Configure Gemini API
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+# "gemini" (default) or "stub" for offline runs, see llm_stub.py
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini").lower()
+GEMINI_MODEL_NAME = "gemini-2.0-flash"
 
-# Initialize the model
-model = genai.GenerativeModel('gemini-2.0-flash')
+# async client limits
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "15"))
+LLM_BREAKER_ERROR_RATE = float(os.getenv("LLM_BREAKER_ERROR_RATE", "0.5"))
+LLM_BREAKER_WINDOW = int(os.getenv("LLM_BREAKER_WINDOW", "20"))
+LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", "5"))
+LLM_BREAKER_COOLDOWN_S = float(os.getenv("LLM_BREAKER_COOLDOWN_S", "30"))
 
-def generate_llm_answer(query, context="", history=None):
-    """
-    Enhances your existing semantic-search-based answer using Google's Gemini model.
-    """
-    
-    history_text = ""
-    if history:
-        # Format last few turns for context
-        history_text = "Conversation History:\n" + "\n".join(
-            [f"{turn['role']}: {turn['content']}" for turn in history[-6:]]
-        )
+# estimated tokens shared by retrieved context and history in each prompt,
+# and the most history turns sent (see PromptBuilder)
+LLM_PROMPT_BUDGET_TOKENS = int(os.getenv("LLM_PROMPT_BUDGET_TOKENS", "1024"))
+LLM_HISTORY_TURNS = int(os.getenv("LLM_HISTORY_TURNS", "6"))
+
+
+class GeminiBackend:
+    """The google.generativeai SDK is imported on first use, not at startup."""
+
+    def __init__(self, model_name=GEMINI_MODEL_NAME):
+        self.model_name = model_name
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            with stage("import google.generativeai"):
+                import google.generativeai as genai
+            # Configure Gemini API
+            genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+            self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    async def generate(self, prompt):
+        if self._model is None:
+            # keep the one-off SDK import off the event loop
+            await asyncio.to_thread(lambda: self.model)
+        response = await self.model.generate_content_async(prompt)
+        return response.text
+
+    def generate_sync(self, prompt):
+        return self.model.generate_content(prompt).text
+
+    async def stream(self, prompt):
+        if self._model is None:
+            await asyncio.to_thread(lambda: self.model)
+        response = await self.model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+def create_backend(name=LLM_BACKEND):
+    if name == "stub":
+        from llm_stub import StubLLMBackend
+
+        return StubLLMBackend()
+    if name == "gemini":
+        return GeminiBackend()
+    raise ValueError(f"Unknown LLM_BACKEND {name!r}")
+
+
+backend = create_backend()
 
-    prompt = f"""
+
+PROMPT_PREAMBLE = """
 You are an AI chatbot for CodeIT Institute.
 Your role is to answer student questions strictly related to:
 1. CodeIT Institute (courses, location, fees, etc.) based on the provided context.
@@ -33,21 +91,332 @@ If a user asks about anything else (e.g., general knowledge, politics, entertain
 
 Maintain a helpful, friendly, and professional tone.
 Use the provided context to answer questions about the institute. If the answer is not in the context, say you don't have that information.
+"""
 
-{history_text}
 
-### Context:
-{context}
+def estimate_tokens(text):
+    """Rough token count (about 4 characters per token); no tokenizer needed."""
+    return (len(text) + 3) // 4
 
-### User Question:
-{query}
 
-### Final Answer:
-"""
+class PromptBuilder:
+    """
+    Assembles LLM prompts from the static preamble (formatted and measured
+    once), the retrieved context blocks and the conversation history.
+
+    Context blocks (best match first) and history turns share budget_tokens:
+    blocks are added in rank order while they fit, so the least relevant go
+    first, then the newest history turns (at most max_history_turns) while
+    they fit, so the oldest go first. A top block larger than the whole
+    budget is cut to fit rather than dropped. The preamble and the question
+    are always sent and are not counted against the budget.
+
+    build() returns (prompt, size), size being the estimated tokens per part
+    and what was dropped; the totals are kept in stats.
+    """
+
+    def __init__(self, budget_tokens=1024, max_history_turns=6, preamble=PROMPT_PREAMBLE):
+        self.budget_tokens = budget_tokens
+        self.max_history_turns = max_history_turns
+        self.preamble = preamble
+        self.preamble_tokens = estimate_tokens(preamble)
+        self.stats = {"prompts": 0, "tokens": 0, "context_blocks_dropped": 0, "history_turns_dropped": 0}
+
+    def build(self, query, context=(), history=None):
+        blocks = [context] if isinstance(context, str) else list(context)
+        blocks = [b for b in blocks if b]
+        budget = self.budget_tokens
+
+        used_blocks = []
+        for block in blocks:
+            tokens = estimate_tokens(block)
+            if tokens > budget:
+                if used_blocks:
+                    break
+                block = block[: budget * 4]
+                tokens = estimate_tokens(block)
+            used_blocks.append(block)
+            budget -= tokens
+        context_tokens = self.budget_tokens - budget
 
+        turns = list(history or [])[-self.max_history_turns:] if self.max_history_turns else []
+        used_turns = []
+        for turn in reversed(turns):
+            line = f"{turn['role']}: {turn['content']}"
+            tokens = estimate_tokens(line) + 1
+            if tokens > budget:
+                break
+            used_turns.append(line)
+            budget -= tokens
+        used_turns.reverse()
+        history_text = "Conversation History:\n" + "\n".join(used_turns) if used_turns else ""
+
+        prompt = (
+            f"{self.preamble}\n{history_text}\n\n### Context:\n" + "\n\n".join(used_blocks)
+            + f"\n\n### User Question:\n{query}\n\n### Final Answer:\n"
+        )
+        size = {
+            "tokens": estimate_tokens(prompt),
+            "preamble": self.preamble_tokens,
+            "context": context_tokens,
+            "history": self.budget_tokens - budget - context_tokens,
+            "question": estimate_tokens(query),
+            "context_blocks": len(used_blocks),
+            "context_blocks_dropped": len(blocks) - len(used_blocks),
+            "history_turns": len(used_turns),
+            # turns beyond max_history_turns are never candidates, not budget drops
+            "history_turns_dropped": len(turns) - len(used_turns),
+        }
+        stats = self.stats
+        stats["prompts"] += 1
+        stats["tokens"] += size["tokens"]
+        stats["context_blocks_dropped"] += size["context_blocks_dropped"]
+        stats["history_turns_dropped"] += size["history_turns_dropped"]
+        return prompt, size
+
+
+prompt_builder = PromptBuilder(budget_tokens=LLM_PROMPT_BUDGET_TOKENS, max_history_turns=LLM_HISTORY_TURNS)
+
+
+def build_prompt(query, context="", history=None):
+    """Builds a prompt with prompt_builder and records its size on the current request."""
+    prompt, size = prompt_builder.build(query, context, history)
+    prompt_size(size["tokens"])
+    return prompt
+
+
+def flight_key(query, context="", history=None):
+    """
+    Identical LLM requests: same normalized question, retrieved context and
+    the history turns that can make it into the prompt.
+    """
+    turns = tuple((turn["role"], turn["content"]) for turn in (history or [])[-LLM_HISTORY_TURNS:])
+    context = context if isinstance(context, str) else tuple(context)
+    return normalize_query(query), context, turns
+
+
+# coalesces identical concurrent sync calls (one upstream call, shared result)
+_sync_flight = SingleFlight()
+
+
+def generate_llm_answer(query, context="", history=None):
+    """
+    Enhances your existing semantic-search-based answer using Google's Gemini model.
+    """
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        return _sync_flight.do(
+            flight_key(query, context, history),
+            lambda: backend.generate_sync(build_prompt(query, context, history)),
+        )
 
     except Exception as e:
         return f"LLM Error: {str(e)}"
+
+
+class CircuitBreaker:
+    """
+    Opens when the error rate over the last `window` calls reaches
+    `error_rate` (after at least `min_calls`), rejects calls for `cooldown`
+    seconds, then lets a single trial call through (half-open).
+
+    allow() returns a ticket (None when the call is rejected) that the caller
+    hands back to record() or abandon(). The epoch in the ticket changes on
+    every state change, so a result from a call that started before the
+    breaker opened is ignored, and only the current trial's result (or
+    abandonment) ends the half-open state.
+    """
+
+    def __init__(self, error_rate=0.5, window=20, min_calls=5, cooldown=30.0, clock=time.monotonic):
+        self.error_rate = error_rate
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self._clock = clock
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = None
+        self._epoch = 0
+        self._trial = None  # ticket of the half-open trial in flight
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def _open(self):
+        self._opened_at = self._clock()
+        self._epoch += 1
+        self._trial = None
+
+    def allow(self):
+        state = self.state
+        if state == "closed":
+            return (self._epoch, False)
+        if state == "half_open" and self._trial is None:
+            self._epoch += 1
+            self._trial = (self._epoch, True)
+            return self._trial
+        return None
+
+    def abandon(self, ticket):
+        """Releases the half-open trial if ticket is it and its caller went away."""
+        if ticket is not None and ticket == self._trial:
+            self._trial = None
+
+    def record(self, ticket, ok):
+        if self._opened_at is not None:
+            # only the half-open trial's result decides the next state
+            if ticket is None or ticket != self._trial:
+                return
+            if ok:
+                self._opened_at = None
+                self._trial = None
+                self._epoch += 1
+                self._outcomes.clear()
+            else:
+                self._open()
+            return
+
+        if ticket is None or ticket[0] != self._epoch:
+            # started before the breaker last opened
+            return
+        self._outcomes.append(ok)
+        failures = self._outcomes.count(False)
+        if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.error_rate:
+            self._open()
+
+
+class AsyncLLMClient:
+    """
+    Non-blocking LLM calls with a global concurrency limit, a per-call
+    deadline (including time spent waiting for a slot) and a circuit breaker.
+    generate() returns None instead of raising, so callers can fall back.
+    Identical concurrent requests (see flight_key) share one upstream call.
+    """
+
+    def __init__(self, backend, max_concurrency=8, timeout=15.0, breaker=None):
+        self.backend = backend
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self._semaphores = weakref.WeakKeyDictionary()
+        self.stats = {"calls": 0, "ok": 0, "errors": 0, "timeouts": 0, "short_circuited": 0}
+        self.flight = AsyncSingleFlight()
+
+    def _semaphore(self):
+        # one semaphore per event loop (tests and scripts may run several)
+        loop = asyncio.get_running_loop()
+        sem = self._semaphores.get(loop)
+        if sem is None:
+            sem = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return sem
+
+    async def _call(self, prompt):
+        async with self._semaphore():
+            return await self.backend.generate(prompt)
+
+    async def generate(self, query, context="", history=None):
+        key = flight_key(query, context, history)
+        return await self.flight.do(key, lambda: self._generate(query, context, history))
+
+    async def _generate(self, query, context, history):
+        self.stats["calls"] += 1
+        ticket = self.breaker.allow()
+        if ticket is None:
+            self.stats["short_circuited"] += 1
+            return None
+
+        prompt = build_prompt(query, context, history)
+        try:
+            text = await asyncio.wait_for(self._call(prompt), self.timeout)
+        except asyncio.CancelledError:
+            self.breaker.abandon(ticket)
+            raise
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            self.breaker.record(ticket, False)
+            return None
+        except Exception:
+            self.stats["errors"] += 1
+            self.breaker.record(ticket, False)
+            return None
+
+        self.stats["ok"] += 1
+        self.breaker.record(ticket, True)
+        return text
+
+    async def stream(self, query, context="", history=None):
+        """
+        Yields the answer in chunks as the backend produces them, under the
+        same concurrency limit and circuit breaker as generate(). The deadline
+        applies to the first chunk (including the wait for a slot) and then to
+        each gap between chunks. A call that is short-circuited or fails before
+        its first chunk yields nothing, so callers can fall back; a failure
+        after that is raised. Streams are not coalesced.
+        """
+        self.stats["calls"] += 1
+        ticket = self.breaker.allow()
+        if ticket is None:
+            self.stats["short_circuited"] += 1
+            return
+
+        prompt = build_prompt(query, context, history)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        sem = self._semaphore()
+        try:
+            await asyncio.wait_for(sem.acquire(), self.timeout)
+        except asyncio.CancelledError:
+            self.breaker.abandon(ticket)
+            raise
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            self.breaker.record(ticket, False)
+            return
+
+        chunks = self.backend.stream(prompt)
+        started = False
+        try:
+            while True:
+                timeout = self.timeout if started else max(deadline - loop.time(), 0)
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout)
+                except StopAsyncIteration:
+                    break
+                started = True
+                yield chunk
+        except (asyncio.CancelledError, GeneratorExit):
+            self.breaker.abandon(ticket)
+            raise
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            self.breaker.record(ticket, False)
+            if started:
+                raise
+            return
+        except Exception:
+            self.stats["errors"] += 1
+            self.breaker.record(ticket, False)
+            if started:
+                raise
+            return
+        finally:
+            sem.release()
+            await chunks.aclose()
+
+        self.stats["ok"] += 1
+        self.breaker.record(ticket, True)
+
+
+llm_client = AsyncLLMClient(
+    backend,
+    max_concurrency=LLM_MAX_CONCURRENCY,
+    timeout=LLM_TIMEOUT_S,
+    breaker=CircuitBreaker(
+        error_rate=LLM_BREAKER_ERROR_RATE,
+        window=LLM_BREAKER_WINDOW,
+        min_calls=LLM_BREAKER_MIN_CALLS,
+        cooldown=LLM_BREAKER_COOLDOWN_S,
+    ),
+)
@@ -0,0 +1,41 @@
+"""
+Offline stand-in for the Gemini backend, for load tests and local runs.
+
+Select it with LLM_BACKEND=stub. Latency and failure rate are configurable so
+timeouts and the circuit breaker can be exercised without network access.
+stream() yields the same answer word by word, spreading the delay evenly
+over the words, so a streamed answer ends when generate() would return.
+"""
+import asyncio
+import os
+import random
+import time
+
+
+class StubLLMBackend:
+    def __init__(self, delay_ms=None, error_rate=None, seed=None):
+        self.delay = (float(os.getenv("LLM_STUB_DELAY_MS", "500")) if delay_ms is None else delay_ms) / 1000.0
+        self.error_rate = float(os.getenv("LLM_STUB_ERROR_RATE", "0")) if error_rate is None else error_rate
+        self._rng = random.Random(seed)
+        self.calls = 0
+
+    def _answer(self, prompt):
+        self.calls += 1
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise RuntimeError("stub LLM failure")
+        question = prompt.rsplit("### User Question:", 1)[-1].split("###", 1)[0].strip()
+        return f"[stub answer] {question}"
+
+    async def generate(self, prompt):
+        await asyncio.sleep(self.delay)
+        return self._answer(prompt)
+
+    async def stream(self, prompt):
+        words = self._answer(prompt).split(" ")
+        for i, word in enumerate(words):
+            await asyncio.sleep(self.delay / len(words))
+            yield word if i == len(words) - 1 else word + " "
+
+    def generate_sync(self, prompt):
+        time.sleep(self.delay)
+        return self._answer(prompt)
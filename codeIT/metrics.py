@@ -0,0 +1,228 @@
+"""
+In-process request metrics for the chat hot path.
+
+Each request gets a RequestTrace (held in a ContextVar, so it follows the
+request into asyncio.to_thread workers). Code on the hot path wraps its steps
+in `with timed("encode"):` and records which branch answered with
+answered_by("semantic"), and llm.py records the estimated size of the
+prompt it sent with prompt_size(tokens). When the request ends the stage times are folded
+into fixed-bucket histograms under one lock, and /metrics renders them in the
+Prometheus text format. Metrics are per process; with several uvicorn workers
+each one is scraped separately.
+
+With METRICS_ENABLED=false no trace is created: timed() returns a shared
+no-op context manager and answered_by() returns immediately.
+"""
+import bisect
+import logging
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+# log requests slower than this (0 disables) with their stage breakdown,
+# sampling SLOW_REQUEST_SAMPLE_RATE of them
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0"))
+SLOW_REQUEST_SAMPLE_RATE = float(os.getenv("SLOW_REQUEST_SAMPLE_RATE", "1.0"))
+
+# histogram upper bounds in seconds (+Inf is implicit)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# prompt size histogram upper bounds in estimated tokens
+TOKEN_BUCKETS = (128, 256, 384, 512, 768, 1024, 1536, 2048, 4096, 8192)
+
+logger = logging.getLogger("codeit-chatbot.metrics")
+
+_current = ContextVar("codeit_request_trace", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        out, running = [], 0
+        for c in self.counts:
+            running += c
+            out.append(running)
+        return out
+
+
+class RequestTrace:
+    __slots__ = ("start", "stages", "answered_by", "question", "prompt_tokens")
+
+    def __init__(self, question=""):
+        self.start = time.perf_counter()
+        self.stages = {}
+        self.answered_by = "unknown"
+        self.question = question
+        self.prompt_tokens = None
+
+
+class _StageTimer:
+    __slots__ = ("trace", "name", "start")
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        stages = self.trace.stages
+        stages[self.name] = stages.get(self.name, 0.0) + time.perf_counter() - self.start
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NOOP = _NoopTimer()
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}  # answered_by -> Histogram of total request seconds
+        self.stages = {}  # stage -> Histogram
+        self.prompts = {}  # answered_by -> Histogram of prompt tokens
+
+    def record(self, trace, total):
+        with self._lock:
+            self._hist(self.requests, trace.answered_by).observe(total)
+            for name, secs in trace.stages.items():
+                self._hist(self.stages, name).observe(secs)
+            if trace.prompt_tokens is not None:
+                self._hist(self.prompts, trace.answered_by, TOKEN_BUCKETS).observe(trace.prompt_tokens)
+
+    @staticmethod
+    def _hist(table, key, buckets=BUCKETS):
+        hist = table.get(key)
+        if hist is None:
+            hist = table[key] = Histogram(buckets)
+        return hist
+
+    def reset(self):
+        with self._lock:
+            self.requests.clear()
+            self.stages.clear()
+            self.prompts.clear()
+
+    def render(self):
+        """Returns the Prometheus exposition lines for all histograms."""
+        with self._lock:
+            lines = []
+            lines += render_counter(
+                "codeit_chat_requests_total", "Chat requests by the branch that answered them.",
+                "answered_by", {k: h.count for k, h in self.requests.items()},
+            )
+            lines += _render_histograms(
+                "codeit_chat_request_seconds", "Chat request latency by answering branch.",
+                "answered_by", self.requests,
+            )
+            lines += _render_histograms(
+                "codeit_chat_stage_seconds", "Time spent in each chat pipeline stage.",
+                "stage", self.stages,
+            )
+            lines += _render_histograms(
+                "codeit_llm_prompt_tokens", "Estimated LLM prompt size in tokens by answering branch.",
+                "answered_by", self.prompts,
+            )
+        return lines
+
+
+def _fmt(value):
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+def render_counter(name, help_text, label, values, kind="counter"):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for key in sorted(values):
+        lines.append(f'{name}{{{label}="{key}"}} {values[key]}')
+    return lines
+
+
+def _render_histograms(name, help_text, label, table):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for key in sorted(table):
+        hist = table[key]
+        for bound, count in zip(hist.buckets + (float("inf"),), hist.cumulative()):
+            lines.append(f'{name}_bucket{{{label}="{key}",le="{_fmt(bound)}"}} {count}')
+        lines.append(f'{name}_sum{{{label}="{key}"}} {hist.sum}')
+        lines.append(f'{name}_count{{{label}="{key}"}} {hist.count}')
+    return lines
+
+
+registry = MetricsRegistry()
+
+
+def timed(name):
+    """Context manager adding the block's wall time to the current request's stage."""
+    trace = _current.get()
+    if trace is None:
+        return _NOOP
+    return _StageTimer(trace, name)
+
+
+def answered_by(label):
+    trace = _current.get()
+    if trace is not None:
+        trace.answered_by = label
+
+
+def prompt_size(tokens):
+    trace = _current.get()
+    if trace is not None:
+        trace.prompt_tokens = tokens
+
+
+class _RequestContext:
+    __slots__ = ("trace", "token")
+
+    def __init__(self, question):
+        self.trace = RequestTrace(question)
+
+    def __enter__(self):
+        self.token = _current.set(self.trace)
+        return self.trace
+
+    def __exit__(self, *exc):
+        try:
+            _current.reset(self.token)
+        except ValueError:
+            # a streamed request may be closed from another context
+            _current.set(None)
+        trace = self.trace
+        total = time.perf_counter() - trace.start
+        registry.record(trace, total)
+        if SLOW_REQUEST_MS and total * 1000 >= SLOW_REQUEST_MS and random.random() < SLOW_REQUEST_SAMPLE_RATE:
+            breakdown = ", ".join(f"{k}={v * 1000:.1f}ms" for k, v in trace.stages.items())
+            if trace.prompt_tokens is not None:
+                breakdown += f", prompt={trace.prompt_tokens} tokens"
+            logger.warning(
+                "slow chat request %.1fms answered_by=%s [%s] question=%r",
+                total * 1000, trace.answered_by, breakdown, trace.question[:80],
+            )
+
+
+def request(question=""):
+    """Context manager tracing one chat request (no-op when metrics are disabled)."""
+    if not METRICS_ENABLED or _current.get() is not None:
+        return _NOOP
+    return _RequestContext(question)
@@ -0,0 +1,105 @@
+"""
+Bounded LRU cache of final replies from the deterministic chatbot branches.
+
+Rule, course-match, lexical and above-threshold semantic answers depend only
+on the question text and the dataset, so chatbot.py stores them here keyed on
+the lowercased, stripped question and serves repeats without running any
+retrieval.
+LLM, cached-LLM and fallback replies are never stored: they depend on the
+conversation history or on an upstream call.
+
+Entries belong to one dataset version; set_dataset_version() (called when the
+KB is reloaded) empties the cache, and a reply computed on another version is
+neither served nor stored. Lookups and stores use the same key, and the
+pipeline itself ignores case and surrounding whitespace, so a cached reply is
+the one the pipeline gives for every question with that key. Inner
+whitespace is part of the key: the pipeline may answer "contact  us"
+differently from "contact us".
+
+Hits and misses are counted per branch: a branch's misses are the replies it
+computed because the cache had none.
+"""
+import threading
+from collections import OrderedDict
+
+
+def cache_key(question):
+    return question.lower().strip()
+
+
+class ResponseCache:
+    def __init__(self, max_size=4096, dataset_version=""):
+        self.max_size = max_size
+        self.dataset_version = dataset_version
+        self._entries = OrderedDict()  # cache_key(question) -> (reply, branch)
+        self._lock = threading.Lock()
+        self.hits = {}
+        self.misses = {}
+        self.uncached = 0  # lookups answered by a non-deterministic branch
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def set_dataset_version(self, version):
+        """Empties the cache if the dataset version changed."""
+        with self._lock:
+            if version != self.dataset_version:
+                self._entries.clear()
+                self.dataset_version = version
+
+    def get(self, question, dataset_version):
+        """Returns (reply, branch) for a cached question, else None."""
+        key = cache_key(question)
+        with self._lock:
+            entry = self._entries.get(key) if dataset_version == self.dataset_version else None
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits[entry[1]] = self.hits.get(entry[1], 0) + 1
+            return entry
+
+    def put(self, question, dataset_version, reply, branch):
+        """Records a reply computed by a deterministic branch after a miss."""
+        key = cache_key(question)
+        with self._lock:
+            self.misses[branch] = self.misses.get(branch, 0) + 1
+            if dataset_version != self.dataset_version:
+                return
+            self._entries[key] = (reply, branch)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def skip(self):
+        """Records a miss answered by a branch that is never cached."""
+        with self._lock:
+            self.uncached += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            hits = sum(self.hits.values())
+            misses = sum(self.misses.values()) + self.uncached
+            branches = {
+                branch: {
+                    "hits": self.hits.get(branch, 0),
+                    "misses": self.misses.get(branch, 0),
+                    "hit_rate": self.hits.get(branch, 0) / (self.hits.get(branch, 0) + self.misses.get(branch, 0)),
+                }
+                for branch in set(self.hits) | set(self.misses)
+            }
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": hits,
+                "misses": misses,
+                "uncached": self.uncached,
+                "evictions": self.evictions,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                "branches": branches,
+            }
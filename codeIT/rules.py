@@ -0,0 +1,192 @@
+"""
+Quick exact-answer rules for the chatbot.
+
+The rules are declared as a table and compiled once at import into a single
+Aho-Corasick automaton, so one pass over the query finds every phrase hit.
+The first rule in table order whose phrases matched (and whose exclusions did
+not) wins, which keeps the priority of the old if/elif chain.
+"""
+from collections import deque
+
+
+class PhraseAutomaton:
+    """Multi-pattern substring matcher (Aho-Corasick)."""
+
+    def __init__(self, phrases):
+        self.phrases = list(phrases)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for pid, phrase in enumerate(self.phrases):
+            state = 0
+            for ch in phrase:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(pid)
+
+        # breadth-first pass to wire failure links and merge outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def scan(self, text):
+        """
+        Returns list of (start, phrase_id) for every occurrence in text.
+        """
+        goto, fail, out, phrases = self._goto, self._fail, self._out, self.phrases
+        hits = []
+        state = 0
+        for pos, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for pid in out[state]:
+                hits.append((pos - len(phrases[pid]) + 1, pid))
+        return hits
+
+
+# --- answer builders for rules that depend on the dataset ---
+
+def _contact_answer(q, dataset, memory):
+    contact = dataset.get("company", {}).get("contact", {})
+    return f"Email: {contact.get('email','')} | Phones: {', '.join(contact.get('phones',[]))} | Working hours: {contact.get('working_hours','')}"
+
+
+def _location_answer(q, dataset, memory):
+    return f"Our company is located at {dataset.get('company', {}).get('location', '')}."
+
+
+def _owner_answer(q, dataset, memory):
+    company = dataset.get("company", {})
+    for m in company.get("mentors", []):
+        role = (m.get("role") or "").lower()
+        if any(r in role for r in ["ceo", "founder", "owner"]):
+            memory["last_person"] = m
+            return f"{m.get('name')} is the {m.get('role')} of {company.get('name')} with {m.get('experience','')} experience."
+    return "Sorry, I couldn't find information about the owner."
+
+
+def _mentors_answer(q, dataset, memory):
+    mentors = dataset.get("company", {}).get("mentors", [])
+    if mentors:
+        return "Some mentors:\n" + "\n".join([f"{m.get('name')} - {m.get('role')} ({m.get('experience','')})" for m in mentors])
+    return "No mentor info available."
+
+
+def _projects_answer(q, dataset, memory):
+    projects_list = dataset.get("projects", [])
+    # Try to find specific project mentions
+    found_projects = []
+    for p in projects_list:
+        if p.get("title", "").lower() in q or p.get("course", "").lower() in q:
+            found_projects.append(f"- {p.get('title')} ({p.get('course')})")
+
+    if found_projects:
+        return "Here are some relevant projects:\n" + "\n".join(found_projects[:3])
+
+    if "what projects" in q or "list projects" in q:
+        return "We have many projects like: " + ", ".join([p["title"] for p in projects_list[:4]]) + "..."
+
+    return "Yes — students work on real projects during the course. Ask me about projects in a specific course!"
+
+
+# Table order is priority order. "prefixes" must match at the start of the
+# query, "phrases" anywhere; a rule is skipped if any "exclude" phrase occurs.
+RULES = [
+    {"name": "greeting", "prefixes": ["hi", "hello", "hey"],
+     "answer": "Hey there! 😊 How can I help you today?"},
+    {"name": "codeit_ai", "phrases": ["what is codeit ai", "codeit ai"],
+     "answer": "CodeIt AI is a smart learning assistant created to help students explore courses, mentors, and everything about CodeIt Institute in a simple way! 🤖✨"},
+    {"name": "identity", "phrases": ["who are you", "who r u"],
+     "answer": "I'm CodeIt AI 🤖 — your friendly learning assistant here to help you explore courses, mentors, and all things CodeIt Institute!"},
+    {"name": "thanks", "phrases": ["thank", "thanks"],
+     "answer": "You're very welcome! 💫"},
+    {"name": "how_are_you", "phrases": ["how are you"],
+     "answer": "I'm great and ready to help you learn! What about you?"},
+    {"name": "contact", "phrases": [
+        "contact number", "contact info", "how do i contact", "institute contact",
+        "contact details", "phone number", "contact us", "how to contact"],
+     "answer": _contact_answer},
+    {"name": "location", "phrases": [
+        "where are you located", "where is your institute", "your location",
+        "institute location", "center location", "where is codeit", "located at"],
+     "answer": _location_answer},
+    {"name": "owner", "phrases": ["ceo", "owner", "founder"],
+     "answer": _owner_answer},
+    {"name": "mentors", "phrases": ["mentor"], "exclude": ["who is"],
+     "answer": _mentors_answer},
+    {"name": "demo", "phrases": ["demo"],
+     "answer": "Yes, demo classes are available."},
+    {"name": "certificate", "phrases": ["certificate", "certification"],
+     "answer": "Yes! You will receive an official completion certificate after finishing the course. 🎓"},
+    {"name": "beginner", "phrases": ["beginner"],
+     "answer": "Yes, we have beginner-friendly courses."},
+    {"name": "payment", "phrases": ["payment"],
+     "answer": "We accept eSewa, Khalti, bank deposits, and in-person payments."},
+    {"name": "projects", "phrases": ["project"], "exclude": ["price"],
+     "answer": _projects_answer},
+]
+
+
+def compile_rules(rules):
+    """
+    Compiles a rule table into (automaton, phrase_table) where phrase_table
+    maps phrase id -> (rule index, kind) with kind in prefix/phrase/exclude.
+    """
+    phrases = []
+    table = []
+    for idx, rule in enumerate(rules):
+        for kind, key in (("prefix", "prefixes"), ("phrase", "phrases"), ("exclude", "exclude")):
+            for p in rule.get(key, []):
+                phrases.append(p)
+                table.append((idx, kind))
+    return PhraseAutomaton(phrases), table
+
+
+def match_rules(q, rules, compiled):
+    """
+    Returns the highest-priority rule matching q, or None.
+    """
+    automaton, table = compiled
+    hit = set()
+    excluded = set()
+    for start, pid in automaton.scan(q):
+        idx, kind = table[pid]
+        if kind == "exclude":
+            excluded.add(idx)
+        elif kind == "phrase" or start == 0:
+            hit.add(idx)
+
+    for idx in sorted(hit):
+        if idx not in excluded:
+            return rules[idx]
+    return None
+
+
+_COMPILED = compile_rules(RULES)
+
+
+def match_rule(q):
+    """
+    Returns the winning quick rule for an already lowercased query, or None.
+    """
+    return match_rules(q, RULES, _COMPILED)
+
+
+def rule_answer(rule, q, dataset, memory):
+    answer = rule["answer"]
+    return answer(q, dataset, memory) if callable(answer) else answer
@@ -0,0 +1,84 @@
+"""
+Singleflight: concurrent calls with the same key share one execution.
+
+The first caller for a key (the leader) starts the call; callers arriving
+while it is in flight wait for the same result, or the same exception. The
+key is forgotten as soon as the call finishes, so nothing is cached.
+
+AsyncSingleFlight runs the call as its own task and every caller awaits it
+through asyncio.shield, so a cancelled caller (even the leader) never cancels
+the shared call. SingleFlight is the thread-based equivalent for sync code.
+"""
+import asyncio
+import threading
+import weakref
+
+
+class AsyncSingleFlight:
+    def __init__(self):
+        self._inflight = weakref.WeakKeyDictionary()  # event loop -> {key: task}
+        self.stats = {"leaders": 0, "shared": 0}
+
+    async def do(self, key, fn):
+        """Returns await fn(), sharing one in-flight fn() among equal keys."""
+        loop = asyncio.get_running_loop()
+        inflight = self._inflight.setdefault(loop, {})
+        task = inflight.get(key)
+        if task is None:
+            self.stats["leaders"] += 1
+            task = inflight[key] = loop.create_task(fn())
+            task.add_done_callback(lambda t: self._finished(inflight, key, t))
+        else:
+            self.stats["shared"] += 1
+        return await asyncio.shield(task)
+
+    @staticmethod
+    def _finished(inflight, key, task):
+        if inflight.get(key) is task:
+            del inflight[key]
+        if not task.cancelled():
+            # mark the exception retrieved even if every caller went away
+            task.exception()
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {"leaders": 0, "shared": 0}
+
+    def do(self, key, fn):
+        """Returns fn(), sharing one in-flight fn() among threads with equal keys."""
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+                self.stats["leaders"] += 1
+            else:
+                self.stats["shared"] += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as exc:
+                call.error = exc
+            finally:
+                with self._lock:
+                    del self._inflight[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
@@ -0,0 +1,51 @@
+"""
+Records how long each startup stage takes (imports, artifact load, model
+load, warm-up) so slow starts can be attributed. Stages may nest; they are
+listed in the order they finish, indented by depth, and only top-level stages
+count towards the total. The API logs report() once warm-up is done and
+then calls stop(), so stages run later (KB reloads) are not recorded.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+_stages = []
+_lock = threading.Lock()
+_local = threading.local()
+_stopped = False
+
+
+@contextmanager
+def stage(name):
+    if _stopped:
+        yield
+        return
+    depth = getattr(_local, "depth", 0)
+    _local.depth = depth + 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _local.depth = depth
+        with _lock:
+            _stages.append((name, time.perf_counter() - start, depth))
+
+
+def stop():
+    global _stopped
+    _stopped = True
+
+
+def stages():
+    with _lock:
+        return list(_stages)
+
+
+def report():
+    rows = stages()
+    labels = ["  " * depth + name for name, _, depth in rows]
+    width = max([len(label) for label in labels] + [5])
+    lines = [f"{label:<{width}} {secs * 1000:9.1f} ms" for label, (_, secs, _) in zip(labels, rows)]
+    total = sum(secs for _, secs, depth in rows if depth == 0)
+    lines.append(f"{'total':<{width}} {total * 1000:9.1f} ms")
+    return "\n".join(lines)
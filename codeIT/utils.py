@@ -1,49 +1,215 @@
+import atexit
+import hashlib
 import json
 import os
+import threading
 import numpy as np
-from sentence_transformers import SentenceTransformer, util
+
+from embedding_batcher import EmbeddingBatcher, configure_torch_threads
+from embedding_cache import QueryEmbeddingCache, normalize_query
+from embedding_store import (
+    at_least_as_precise,
+    open_store,
+    prune_versions,
+    read_pointer,
+    store_lock,
+    versioned_path,
+    write_pointer,
+    write_store,
+)
+from startup_profile import stage
 
 # config
 EMB_MODEL_NAME = "all-MiniLM-L6-v2"
+EMB_STORE_FILE = "kb_artifact.store"
+# on-disk/in-memory precision of KB rows: float32, float16 or int8
+EMB_STORE_DTYPE = os.getenv("EMB_STORE_DTYPE", "int8")
+# older text-list + matrix pair, only read to seed EMB_STORE_FILE
 EMB_CACHE_FILE = "kb_embeddings.npy"
 KB_TEXTS_FILE = "kb_texts.json"
 
-# single model instance (used for encoding queries + docs)
-model = SentenceTransformer(EMB_MODEL_NAME)
+# query-embedding cache (TTL in seconds, 0 = no expiry; empty file = memory only)
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "2048"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "0"))
+QUERY_CACHE_FILE = os.getenv("QUERY_CACHE_FILE", "")
+
+# micro-batching of concurrent query encodes (window in milliseconds)
+EMBED_BATCHING = os.getenv("EMBED_BATCHING", "true").lower() == "true"
+EMBED_BATCH_MAX = int(os.getenv("EMBED_BATCH_MAX", "32"))
+EMBED_BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", "2"))
+TORCH_NUM_THREADS = int(os.getenv("TORCH_NUM_THREADS", "0"))
+
+# single model instance (used for encoding queries + docs), loaded on first use
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    """
+    Returns the shared SentenceTransformer, importing torch and
+    sentence-transformers the first time an encode is needed.
+    """
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                with stage("import sentence_transformers"):
+                    from sentence_transformers import SentenceTransformer
+                configure_torch_threads(TORCH_NUM_THREADS)
+                with stage("load encoder"):
+                    _model = SentenceTransformer(EMB_MODEL_NAME)
+    return _model
+
+batcher = None
+if EMBED_BATCHING:
+    batcher = EmbeddingBatcher(
+        lambda texts: get_model().encode(texts, convert_to_numpy=True, batch_size=EMBED_BATCH_MAX),
+        max_batch=EMBED_BATCH_MAX,
+        max_wait_ms=EMBED_BATCH_WINDOW_MS,
+    )
+
+query_cache = QueryEmbeddingCache(
+    max_size=QUERY_CACHE_SIZE,
+    ttl=QUERY_CACHE_TTL,
+    path=QUERY_CACHE_FILE,
+    model_name=EMB_MODEL_NAME,
+)
+if QUERY_CACHE_FILE:
+    atexit.register(query_cache.save)
 
 def load_json(path):
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
+def file_sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
 def save_json(path, data):
     with open(path, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
-def create_or_load_embeddings(kb_texts):
+def text_key(text, model_name=EMB_MODEL_NAME):
+    """Content hash identifying one KB text embedded by one model."""
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+def load_embedding_cache(path=EMB_STORE_FILE, legacy_seed=True, dtype=None):
     """
-    Creates or loads cached embeddings. Returns numpy array shape (N, D).
+    Returns {text_key: float32 embedding} from the embedding store, seeded
+    from the older kb_embeddings.npy / kb_texts.json pair when no store exists yet.
+    With dtype, a store saved at a lower precision (e.g. int8 rows for a
+    float32 build) is not reused, so those texts are re-encoded.
     """
-    if os.path.exists(EMB_CACHE_FILE) and os.path.exists(KB_TEXTS_FILE):
-        try:
+    try:
+        if os.path.exists(path):
+            store = open_store(path)
+            if dtype is None or at_least_as_precise(store.dtype, dtype):
+                return dict(zip(store.keys, store.dequantize()))
+            return {}
+        if legacy_seed and os.path.exists(EMB_CACHE_FILE) and os.path.exists(KB_TEXTS_FILE):
             saved_texts = load_json(KB_TEXTS_FILE)
-            if saved_texts == kb_texts:
-                emb = np.load(EMB_CACHE_FILE)
-                if emb.shape[0] == len(kb_texts):
-                    return emb
-        except Exception:
-            pass
+            emb = np.load(EMB_CACHE_FILE)
+            if emb.shape[0] == len(saved_texts):
+                return {text_key(t): e for t, e in zip(saved_texts, emb)}
+    except Exception:
+        pass
+    return {}
+
+def _open_matching(path, keys, dtype, extra):
+    """Returns the store at path if it holds exactly these rows, else None."""
+    try:
+        store = open_store(path)
+    except Exception:
+        return None
+    if store.keys == keys and store.dtype == dtype and store.extra == extra:
+        return store
+    return None
+
+def create_or_load_embeddings(kb_texts, path=EMB_STORE_FILE, legacy_seed=True, dtype=None, extra=None):
+    """
+    Creates or loads cached embeddings. Returns a memory-mapped
+    embedding_store.EmbeddingStore whose rows follow kb_texts.
+    Only texts whose (model, content) hash is not stored are encoded; texts
+    no longer in the KB are dropped when the store is rewritten. extra is
+    saved alongside (see kb_artifact).
+
+    The store is written to a new versioned file and path is repointed at it,
+    so a file other workers have mapped is never replaced; the build runs
+    under a lock, so concurrent callers wait and reuse one build.
+    """
+    dtype = dtype or EMB_STORE_DTYPE
+    extra = extra or {}
+    keys = [text_key(t) for t in kb_texts]
+    store = _open_matching(path, keys, dtype, extra)
+    if store is not None:
+        return store
+
+    with store_lock(path):
+        # another process may have built it while we waited
+        store = _open_matching(path, keys, dtype, extra)
+        if store is not None:
+            return store
+        version = hashlib.sha256(
+            json.dumps([EMB_MODEL_NAME, dtype, keys, extra], sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        target = versioned_path(path, version)
+        if _open_matching(target, keys, dtype, extra) is None:
+            cache = load_embedding_cache(path, legacy_seed, dtype)
+            missing = {k: t for k, t in zip(keys, kb_texts) if k not in cache}
+            if missing:
+                # compute embeddings (batch_size to avoid memory spikes)
+                new_emb = get_model().encode(list(missing.values()), convert_to_numpy=True,
+                                       show_progress_bar=len(missing) > 32, batch_size=32)
+                cache.update(zip(missing.keys(), new_emb))
+
+            if kb_texts:
+                emb = np.stack([cache[k] for k in keys])
+            else:
+                emb = np.zeros((0, get_model().get_sentence_embedding_dimension()), dtype=np.float32)
+            del cache  # may hold rows mapped from the file path is about to stop naming
+            write_store(target, keys, emb, dtype=dtype, model_name=EMB_MODEL_NAME, extra=extra)
+
+        previous = read_pointer(path)
+        write_pointer(path, target)
+        # keep the version workers may still be serving until their next reload
+        prune_versions(path, keep=(target, previous))
+    return open_store(target)
 
-    # compute embeddings (batch_size to avoid memory spikes)
-    emb = model.encode(kb_texts, convert_to_numpy=True, show_progress_bar=True, batch_size=32)
-    np.save(EMB_CACHE_FILE, emb)
-    save_json(KB_TEXTS_FILE, kb_texts)
-    return emb
+def _encode_uncached(text):
+    if batcher is not None:
+        return batcher.encode(text)[None, :]
+    return get_model().encode([text], convert_to_numpy=True)
+
+def encode_query(query):
+    """
+    Returns the (1, D) embedding for a query, served from query_cache when possible.
+    """
+    return query_cache.get_or_compute(query, EMB_MODEL_NAME, _encode_uncached)
+
+def encode_queries(queries):
+    """
+    Returns the (N, D) embeddings for many queries: cached ones come from
+    query_cache, the rest are encoded together (through the batcher when it
+    is enabled, so only its thread runs the model).
+    """
+    embs = [query_cache.get(q, EMB_MODEL_NAME) for q in queries]
+    missing = [i for i, e in enumerate(embs) if e is None]
+    if missing:
+        texts = list(dict.fromkeys(normalize_query(queries[i]) for i in missing))
+        if batcher is not None:
+            encoded = batcher.encode_many(texts)
+        else:
+            encoded = get_model().encode(texts, convert_to_numpy=True, batch_size=EMBED_BATCH_MAX)
+        by_text = dict(zip(texts, encoded))
+        for i in missing:
+            emb = by_text[normalize_query(queries[i])][None, :]
+            query_cache.put(queries[i], EMB_MODEL_NAME, emb)
+            embs[i] = emb
+    return np.concatenate(embs, axis=0)
 
-def semantic_search(query, kb_embeddings, kb_texts, top_k=3):
+def semantic_search(query, index, top_k=3):
     """
+    Encodes query and searches a vector_index.VectorIndex.
     Returns list of (kb_text, score, index) sorted by score desc.
     """
-    q_emb = model.encode([query], convert_to_numpy=True)
-    scores = util.cos_sim(q_emb, kb_embeddings)[0].cpu().numpy()
-    idxs = np.argsort(-scores)[:top_k]
-    return [(kb_texts[i], float(scores[i]), int(i)) for i in idxs]
+    q_emb = encode_query(query)
+    return index.search(q_emb, top_k=top_k)
@@ -0,0 +1,196 @@
+"""
+In-memory vector index over KB embeddings (pure NumPy).
+
+Rows are L2-normalized once when the index is built, so a query is scored with
+a single matmul and the top-k is picked with argpartition instead of a full
+sort. For large KBs the "ivf" mode clusters rows with spherical k-means and
+only scores the rows in the `n_probe` closest clusters (approximate).
+
+Rows can carry a group id (the answer they paraphrase); search then ranks
+groups by their best row, so top-k means k distinct answers.
+
+The index can also sit directly on an embedding_store.EmbeddingStore: the
+(possibly memory-mapped float16/int8) matrix is scored in float32 chunks
+without materializing a float32 copy of the whole KB.
+"""
+import numpy as np
+
+INDEX_MODES = ("exact", "ivf")
+# rows converted to float32 at a time when scoring a quantized matrix
+SCORE_CHUNK_ROWS = 4096
+
+
+def normalize_rows(mat):
+    mat = np.asarray(mat, dtype=np.float32)
+    if mat.ndim == 1:
+        mat = mat[None, :]
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return mat / norms
+
+
+def top_k_indices(scores, k):
+    """
+    Returns indices of the k largest scores, sorted by score desc.
+    """
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.shape[0]:
+        idxs = np.argpartition(-scores, k - 1)[:k]
+    else:
+        idxs = np.arange(scores.shape[0])
+    return idxs[np.argsort(-scores[idxs], kind="stable")]
+
+
+def spherical_kmeans(vectors, n_clusters, n_iter=20, seed=0):
+    """
+    Clusters unit vectors by cosine similarity. Returns (centroids, labels).
+    """
+    rng = np.random.default_rng(seed)
+    n_clusters = max(1, min(n_clusters, vectors.shape[0]))
+    centroids = vectors[rng.choice(vectors.shape[0], n_clusters, replace=False)].copy()
+    labels = np.zeros(vectors.shape[0], dtype=np.int64)
+    for it in range(n_iter):
+        new_labels = np.argmax(vectors @ centroids.T, axis=1)
+        if it and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        for c in range(n_clusters):
+            members = vectors[labels == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+            else:
+                # re-seed empty clusters on a random row
+                centroids[c] = vectors[rng.integers(vectors.shape[0])]
+        centroids = normalize_rows(centroids)
+    return centroids, labels
+
+
+class VectorIndex:
+    def __init__(self, embeddings, texts, mode="exact", n_lists=None, n_probe=4, seed=0, groups=None):
+        if mode not in INDEX_MODES:
+            raise ValueError(f"Unknown index mode {mode!r}; expected one of {INDEX_MODES}")
+        if len(texts) != len(embeddings):
+            raise ValueError("embeddings and texts must have the same length")
+        self.texts = list(texts)
+        self.groups = None
+        if groups is not None:
+            # row -> answer id; rows of a group must be contiguous (kbuilder.flatten_kb_groups)
+            self.groups = np.asarray(groups, dtype=np.int64)
+            if len(self.groups) != len(self.texts) or np.any(np.diff(self.groups) < 0):
+                raise ValueError("groups must be a non-decreasing id per row")
+            self._starts = np.flatnonzero(np.r_[True, self.groups[1:] != self.groups[:-1]])
+            if not len(self.texts):
+                self._starts = np.empty(0, dtype=np.int64)
+            self._ends = np.r_[self._starts[1:], len(self.texts)]
+        self.scales = None
+        if hasattr(embeddings, "dequantize"):
+            # EmbeddingStore rows are already normalized
+            self.vectors = embeddings.matrix
+            self.scales = embeddings.scales
+        elif len(texts):
+            self.vectors = normalize_rows(embeddings)
+        else:
+            self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.mode = mode
+        self.n_probe = n_probe
+
+        if mode == "ivf" and len(self.texts):
+            n_lists = n_lists or max(1, int(np.sqrt(len(self.texts))))
+            dense = self.vectors if self.scales is None else self.vectors * self.scales[:, None]
+            self.centroids, labels = spherical_kmeans(normalize_rows(dense), n_lists, seed=seed)
+            self.lists = [np.flatnonzero(labels == c) for c in range(self.centroids.shape[0])]
+
+    def __len__(self):
+        return len(self.texts)
+
+    def scores(self, q, rows=None):
+        """
+        Cosine scores of unit vector q (D,) against all rows (or the given
+        rows); q may also be a (D, B) matrix of B queries.
+        """
+        mat = self.vectors if rows is None else self.vectors[rows]
+        if mat.dtype == np.float32:
+            out = mat @ q
+        else:
+            out = np.empty((mat.shape[0],) + q.shape[1:], dtype=np.float32)
+            for start in range(0, mat.shape[0], SCORE_CHUNK_ROWS):
+                end = start + SCORE_CHUNK_ROWS
+                out[start:end] = mat[start:end].astype(np.float32) @ q
+        if self.scales is not None:
+            scales = self.scales if rows is None else self.scales[rows]
+            out *= scales.reshape((-1,) + (1,) * (q.ndim - 1))
+        return out
+
+    def search(self, query_emb, top_k=3):
+        """
+        Returns list of (kb_text, score, index) sorted by score desc; with
+        groups, at most one (the best) row per group.
+        """
+        if not self.texts:
+            return []
+        q = normalize_rows(query_emb)[0]
+
+        if self.mode == "ivf":
+            probe = top_k_indices(self.centroids @ q, self.n_probe)
+            rows = np.concatenate([self.lists[c] for c in probe])
+            idxs, top_scores = self._top(self.scores(q, rows), top_k, rows)
+        else:
+            idxs, top_scores = self._top(self.scores(q), top_k)
+
+        return [(self.texts[i], float(s), int(i)) for i, s in zip(idxs, top_scores)]
+
+    def _top(self, scores, k, rows=None):
+        """
+        Top-k of scores (over all rows, or the given rows). With groups, each
+        group counts once, at its best-scoring row. Returns (row ids, scores).
+        """
+        if self.groups is None:
+            order = top_k_indices(scores, k)
+        elif rows is None:
+            best = top_k_indices(np.maximum.reduceat(scores, self._starts), k)
+            order = np.array(
+                [s + int(np.argmax(scores[s:e])) for s, e in zip(self._starts[best], self._ends[best])],
+                dtype=np.int64,
+            )
+        else:
+            by_score = np.argsort(-scores, kind="stable")
+            _, first = np.unique(self.groups[rows[by_score]], return_index=True)
+            best = by_score[first]
+            order = best[top_k_indices(scores[best], k)]
+        return (order if rows is None else rows[order]), scores[order]
+
+    def search_batch(self, query_embs, top_k=3):
+        """
+        search() for many queries at once: in exact mode all of them are
+        scored with one matrix multiply. Returns one result list per query.
+        """
+        q = normalize_rows(query_embs)
+        if not self.texts:
+            return [[] for _ in range(q.shape[0])]
+        if self.mode == "ivf":
+            return [self.search(row, top_k) for row in q]
+
+        k = min(top_k, len(self.texts))
+        if k <= 0:
+            return [[] for _ in range(q.shape[0])]
+        scores = np.ascontiguousarray(self.scores(q.T).T)  # (B, N)
+        if self.groups is not None:
+            out = []
+            for row in scores:
+                idxs, top = self._top(row, k)
+                out.append([(self.texts[i], float(s), int(i)) for i, s in zip(idxs, top)])
+            return out
+        if k < scores.shape[1]:
+            idxs = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            idxs = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        top = np.take_along_axis(scores, idxs, axis=1)
+        order = np.argsort(-top, axis=1, kind="stable")
+        idxs = np.take_along_axis(idxs, order, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        return [
+            [(self.texts[i], float(s), int(i)) for i, s in zip(row_idxs, row_scores)]
+            for row_idxs, row_scores in zip(idxs, top)
+        ]